@@ -7,7 +7,7 @@ Main entry point with authentication and navigation.
 
 import streamlit as st
 from datetime import datetime
-from database import init_database, DatabaseManager
+from database import init_database, get_db_manager
 from utils import (
     load_config,
     init_authenticator,
@@ -81,7 +81,7 @@ def show_home():
     # Quick stats
     st.subheader("Quick Statistics")
     
-    db = st.session_state.db_manager
+    db = get_db_manager()
     
     col1, col2, col3, col4 = st.columns(4)
     
@@ -173,14 +173,13 @@ def main():
         st.error("The application cannot continue without a database. Please contact support.")
         st.stop()
     
-    # Initialize database manager
-    if 'db_manager' not in st.session_state:
-        try:
-            st.session_state.db_manager = DatabaseManager()
-        except Exception as e:
-            st.error(f"❌ Failed to create database manager: {e}")
-            st.error("The application cannot continue. Please contact support.")
-            st.stop()
+    # Initialize the shared database manager (created once per server process)
+    try:
+        get_db_manager()
+    except Exception as e:
+        st.error(f"❌ Failed to create database manager: {e}")
+        st.error("The application cannot continue. Please contact support.")
+        st.stop()
     
     # Sidebar
     with st.sidebar:
@@ -1,5 +1,5 @@
 """Database package initialization."""
 from .schema import init_database
-from .db_manager import DatabaseManager
+from .db_manager import DatabaseManager, get_db_manager
 
-__all__ = ['init_database', 'DatabaseManager']
+__all__ = ['init_database', 'DatabaseManager', 'get_db_manager']
@@ -18,6 +18,8 @@ load_dotenv()
 MALNUTRITION_Z_SCORE_THRESHOLD = -2  # WHO standard for malnutrition
 PREGNANCY_DURATION_DAYS = 280  # Approximate duration of pregnancy
 HYPERTENSION_THRESHOLD_SYSTOLIC = 140  # Systolic BP threshold for hypertension (mmHg)
+HYPERTENSION_THRESHOLD_DIASTOLIC = 90  # Diastolic BP threshold for hypertension (mmHg)
+ANEMIA_THRESHOLD_HB = 11  # Hemoglobin threshold for anemia in pregnancy (g/dL)
 
 
 class DatabaseManager:
@@ -200,6 +202,54 @@ class DatabaseManager:
         resident = self.get_resident(unique_id)
         return resident is not None
     
+    def get_max_resident_sequence(self, year: int) -> int:
+        """
+        Get the highest resident ID sequence number issued for a year.
+        
+        Valid sequences are zero-padded to four digits, so the lexically
+        greatest VH-YYYY-XXXX ID of the year carries the highest sequence.
+        If that ID is malformed, all IDs of the year are scanned and those
+        whose suffix is not a number are skipped.
+        
+        Args:
+            year: Registration year
+            
+        Returns:
+            Highest sequence number, or 0 if no IDs exist for the year
+            
+        Raises:
+            Exception: If the residents table cannot be queried, so callers
+                never re-issue an existing ID
+        """
+        prefix = f'VH-{year}-'
+        
+        def ids_query():
+            return self.supabase.table('residents').select('unique_id').like(
+                'unique_id', f'{prefix}%'
+            ).order('unique_id', desc=True)
+        
+        top = ids_query().limit(1).execute().data or []
+        if not top:
+            return 0
+        suffix = top[0]['unique_id'][len(prefix):]
+        if len(suffix) == 4 and suffix.isdecimal():
+            return int(suffix)
+        
+        # Malformed ID sorts first: page through every ID of the year (the
+        # ORDER BY keeps pages from overlapping or skipping rows)
+        page_size = 1000  # Supabase caps each response at 1000 rows
+        max_sequence = 0
+        start = 0
+        while True:
+            rows = ids_query().range(start, start + page_size - 1).execute().data or []
+            for row in rows:
+                suffix = row['unique_id'][len(prefix):]
+                if suffix.isdecimal():
+                    max_sequence = max(max_sequence, int(suffix))
+            if len(rows) < page_size:
+                return max_sequence
+            start += page_size
+    
     def get_resident_count(self) -> int:
         """Get total number of residents."""
         try:
@@ -610,55 +660,85 @@ class DatabaseManager:
     
     def add_maternal_health_record(self, maternal_data: Dict) -> bool:
         """Add maternal health (ANC/PNC) record."""
+        return self.add_maternal_health_records([maternal_data])
+    
+    def add_maternal_health_records(self, records: List[Dict]) -> bool:
+        """
+        Add several maternal health (ANC/PNC) records in a single request.
+        
+        Args:
+            records: List of maternal health record dictionaries
+            
+        Returns:
+            True if all records were inserted, False otherwise
+        """
         try:
-            self.supabase.table('maternal_health').insert(maternal_data).execute()
+            self.supabase.table('maternal_health').insert(records).execute()
             return True
         except Exception as e:
-            print(f"Error adding maternal health record: {e}")
+            print(f"Error adding maternal health records: {e}")
             return False
     
-    def get_maternal_health_records(self, resident_id: str) -> List[Dict]:
-        """Get all maternal health records for a resident."""
+    def get_maternal_health_records(self, resident_id: str, visit_type: Optional[str] = None,
+                                    columns: str = '*', limit: Optional[int] = None) -> List[Dict]:
+        """
+        Get maternal health records for a resident, newest visit first.
+        
+        Args:
+            resident_id: Unique ID of the mother
+            visit_type: Only return records of this type ('ANC' or 'PNC'), or all if None
+            columns: Comma-separated columns to select
+            limit: Maximum number of (most recent) records to return, or all if None
+            
+        Returns:
+            List of maternal health record dictionaries
+        """
         try:
-            response = self.supabase.table('maternal_health').select('*').eq(
+            query = self.supabase.table('maternal_health').select(columns).eq(
                 'resident_id', resident_id
-            ).order('visit_date', desc=True).execute()
+            )
+            if visit_type:
+                query = query.eq('visit_type', visit_type)
+            query = query.order('visit_date', desc=True)
+            if limit:
+                query = query.limit(limit)
+            response = query.execute()
             return response.data if response.data else []
         except Exception as e:
             print(f"Error getting maternal health records: {e}")
             return []
     
     def get_high_risk_mothers(self) -> List[Dict]:
-        """Get list of high-risk mothers (high BP or low Hb)."""
+        """Get list of high-risk mothers (high BP, low Hb or danger signs)."""
+        # Risk predicate evaluated by the database so only high-risk ANC rows are
+        # transferred; Hb of 0 means "not recorded" and is not treated as anemia
+        risk_filter = (
+            f'bp_systolic.gte.{HYPERTENSION_THRESHOLD_SYSTOLIC},'
+            f'bp_diastolic.gte.{HYPERTENSION_THRESHOLD_DIASTOLIC},'
+            f'and(hemoglobin.gt.0,hemoglobin.lt.{ANEMIA_THRESHOLD_HB}),'
+            'danger_signs.neq.""'
+        )
         try:
-            # Get recent ANC records with danger signs or abnormal vitals
             # Note: The foreign key reference 'maternal_health_resident_id_fkey' follows
             # Supabase's default naming convention. If your FK has a custom name, update this.
             response = self.supabase.table('maternal_health').select(
                 '*, residents!maternal_health_resident_id_fkey(name, unique_id)'
-            ).eq('visit_type', 'ANC').order('visit_date', desc=True).execute()
+            ).eq('visit_type', 'ANC').or_(risk_filter).order('visit_date', desc=True).execute()
             
             high_risk = []
             seen_residents = set()
             
-            if response.data:
-                for record in response.data:
-                    resident_id = record.get('resident_id')
-                    if resident_id in seen_residents:
-                        continue
-                    
-                    # Check for high risk factors
-                    bp_systolic = record.get('bp_systolic', 0) or 0
-                    hemoglobin = record.get('hemoglobin', 100) or 100
-                    danger_signs = record.get('danger_signs', '')
-                    
-                    if bp_systolic >= 140 or hemoglobin < 11 or danger_signs:
-                        seen_residents.add(resident_id)
-                        # Flatten nested resident data
-                        if 'residents' in record and record['residents']:
-                            record['resident_name'] = record['residents']['name']
-                            del record['residents']
-                        high_risk.append(record)
+            # Keep the most recent high-risk visit per mother
+            for record in response.data or []:
+                resident_id = record.get('resident_id')
+                if resident_id in seen_residents:
+                    continue
+                seen_residents.add(resident_id)
+                # Flatten nested resident data
+                if 'residents' in record and record['residents']:
+                    record['resident_name'] = record['residents']['name']
+                    del record['residents']
+                high_risk.append(record)
             
             return high_risk
         except Exception as e:
@@ -667,28 +747,21 @@ class DatabaseManager:
             try:
                 response = self.supabase.table('maternal_health').select('*').eq(
                     'visit_type', 'ANC'
-                ).order('visit_date', desc=True).execute()
+                ).or_(risk_filter).order('visit_date', desc=True).execute()
                 
                 high_risk = []
                 seen_residents = set()
                 
-                if response.data:
-                    for record in response.data:
-                        resident_id = record.get('resident_id')
-                        if resident_id in seen_residents:
-                            continue
-                        
-                        bp_systolic = record.get('bp_systolic', 0) or 0
-                        hemoglobin = record.get('hemoglobin', 100) or 100
-                        danger_signs = record.get('danger_signs', '')
-                        
-                        if bp_systolic >= 140 or hemoglobin < 11 or danger_signs:
-                            seen_residents.add(resident_id)
-                            # Get resident name separately
-                            resident = self.get_resident(resident_id)
-                            if resident:
-                                record['resident_name'] = resident['name']
-                            high_risk.append(record)
+                for record in response.data or []:
+                    resident_id = record.get('resident_id')
+                    if resident_id in seen_residents:
+                        continue
+                    seen_residents.add(resident_id)
+                    # Get resident name separately
+                    resident = self.get_resident(resident_id)
+                    if resident:
+                        record['resident_name'] = resident['name']
+                    high_risk.append(record)
                 
                 return high_risk
             except:
@@ -894,3 +967,14 @@ class DatabaseManager:
         except Exception as e:
             print(f"Error getting NCD analytics: {e}")
             return {'total_ncd_patients': 0, 'uncontrolled_bp_trend': {}}
+
+
+@st.cache_resource
+def get_db_manager() -> DatabaseManager:
+    """
+    Get the DatabaseManager shared by all sessions.
+    
+    Returns:
+        Process-wide DatabaseManager instance (one Supabase client)
+    """
+    return DatabaseManager()
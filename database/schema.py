@@ -142,9 +142,11 @@ def init_database() -> None:
     CREATE INDEX IF NOT EXISTS idx_medical_history_resident ON medical_history(resident_id);
     CREATE INDEX IF NOT EXISTS idx_growth_monitoring_resident ON growth_monitoring(resident_id);
     CREATE INDEX IF NOT EXISTS idx_maternal_health_resident ON maternal_health(resident_id);
+    CREATE INDEX IF NOT EXISTS idx_maternal_health_resident_visit ON maternal_health(resident_id, visit_date DESC);
     CREATE INDEX IF NOT EXISTS idx_ncd_followup_resident ON ncd_followup(resident_id);
     CREATE INDEX IF NOT EXISTS idx_ncd_followup_date ON ncd_followup(checkup_date);
     CREATE INDEX IF NOT EXISTS idx_residents_samagra_id ON residents(samagra_id);
+    CREATE INDEX IF NOT EXISTS idx_residents_unique_id_pattern ON residents(unique_id text_pattern_ops);
     """
     
     print("=" * 60)
@@ -2,7 +2,7 @@
 echo Installing Python dependencies...
 echo.
 
-pip install streamlit>=1.31.0
+pip install streamlit>=1.37.0
 pip install streamlit-authenticator>=0.2.3
 pip install pandas>=2.0.0
 pip install plotly>=5.18.0
@@ -7,7 +7,7 @@ import streamlit as st
 from datetime import datetime, date, timedelta
 import plotly.graph_objects as go
 import pandas as pd
-from database import DatabaseManager
+from database import get_db_manager
 from utils import check_authentication, get_current_user_name, select_resident_widget
 
 # Check authentication
@@ -15,11 +15,8 @@ if not check_authentication():
     st.error("Please log in to access this page")
     st.stop()
 
-# Initialize database manager
-if 'db_manager' not in st.session_state:
-    st.session_state.db_manager = DatabaseManager()
-
-db = st.session_state.db_manager
+# Shared database manager (one per server process)
+db = get_db_manager()
 
 # Page header
 st.title("💊 NCD Followup Tracking")
@@ -5,7 +5,7 @@ Allows health workers to register new residents with profile photos.
 
 import streamlit as st
 from datetime import datetime
-from database import DatabaseManager
+from database import get_db_manager
 from utils import (
     check_authentication,
     get_current_user_name,
@@ -13,7 +13,8 @@ from utils import (
     save_uploaded_photo,
     validate_phone,
     validate_age,
-    validate_required_field
+    validate_required_field,
+    clear_resident_search_cache
 )
 
 # Check authentication
@@ -21,11 +22,8 @@ if not check_authentication():
     st.error("Please log in to access this page")
     st.stop()
 
-# Initialize database manager
-if 'db_manager' not in st.session_state:
-    st.session_state.db_manager = DatabaseManager()
-
-db = st.session_state.db_manager
+# Shared database manager (one per server process)
+db = get_db_manager()
 
 # Page header
 st.title("📝 Register New Resident")
@@ -93,7 +91,11 @@ with st.form("registration_form"):
                 st.error(error)
         else:
             # Generate unique ID
-            unique_id = generate_unique_id(db)
+            try:
+                unique_id = generate_unique_id(db)
+            except Exception as e:
+                st.error(f"Could not generate a resident ID: {e}")
+                st.stop()
             
             # Save photo if uploaded
             photo_path = None
@@ -122,6 +124,7 @@ with st.form("registration_form"):
             success = db.add_resident(resident_data)
             
             if success:
+                clear_resident_search_cache()
                 st.success(f"✅ Resident registered successfully!")
                 st.info(f"**Unique ID:** {unique_id}")
                 st.balloons()
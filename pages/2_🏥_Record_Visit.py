@@ -5,7 +5,7 @@ Allows health workers to record visits with vitals and observations.
 
 import streamlit as st
 from datetime import datetime
-from database import DatabaseManager
+from database import get_db_manager
 from utils import (
     check_authentication,
     get_current_user_name,
@@ -25,11 +25,8 @@ if not check_authentication():
     st.error("Please log in to access this page")
     st.stop()
 
-# Initialize database manager
-if 'db_manager' not in st.session_state:
-    st.session_state.db_manager = DatabaseManager()
-
-db = st.session_state.db_manager
+# Shared database manager (one per server process)
+db = get_db_manager()
 
 # Page header
 st.title("🏥 Record Visit")
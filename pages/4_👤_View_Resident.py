@@ -7,19 +7,16 @@ import streamlit as st
 import plotly.graph_objects as go
 from datetime import datetime
 import os
-from database import DatabaseManager
-from utils import check_authentication, photo_exists, select_resident_widget
+from database import get_db_manager
+from utils import check_authentication, photo_exists, batch_photo_exists, select_resident_widget
 
 # Check authentication
 if not check_authentication():
     st.error("Please log in to access this page")
     st.stop()
 
-# Initialize database manager
-if 'db_manager' not in st.session_state:
-    st.session_state.db_manager = DatabaseManager()
-
-db = st.session_state.db_manager
+# Shared database manager (one per server process)
+db = get_db_manager()
 
 # Page header
 st.title("👤 View Resident Profile")
@@ -178,8 +175,8 @@ if resident:
                         st.write("**Photos:**")
                         photo_paths = visit['photo_paths'].split(',')
                         cols = st.columns(min(len(photo_paths), 3))
-                        for idx, photo_path in enumerate(photo_paths):
-                            if photo_exists(photo_path):
+                        for idx, (photo_path, exists) in enumerate(zip(photo_paths, batch_photo_exists(photo_paths))):
+                            if exists:
                                 with cols[idx % 3]:
                                     st.image(photo_path, width=200)
         else:
@@ -238,13 +235,15 @@ if resident:
         if resident['photo_path'] and photo_exists(resident['photo_path']):
             all_photos.append(('Profile', resident['photo_path']))
         
-        # Visit photos
-        for visit in visits:
-            if visit['photo_paths']:
-                photo_paths = visit['photo_paths'].split(',')
-                for photo_path in photo_paths:
-                    if photo_exists(photo_path):
-                        all_photos.append((f"Visit {visit['visit_date']}", photo_path))
+        # Visit photos (all checked in one concurrent batch)
+        visit_photos = [
+            (f"Visit {visit['visit_date']}", photo_path)
+            for visit in visits if visit['photo_paths']
+            for photo_path in visit['photo_paths'].split(',')
+        ]
+        for photo, exists in zip(visit_photos, batch_photo_exists([path for _, path in visit_photos])):
+            if exists:
+                all_photos.append(photo)
         
         if all_photos:
             # Display photos in grid
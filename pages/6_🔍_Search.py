@@ -5,7 +5,7 @@ Search residents by various criteria and browse all residents.
 
 import streamlit as st
 import pandas as pd
-from database import DatabaseManager
+from database import get_db_manager
 from utils import check_authentication
 
 # Check authentication
@@ -13,11 +13,8 @@ if not check_authentication():
     st.error("Please log in to access this page")
     st.stop()
 
-# Initialize database manager
-if 'db_manager' not in st.session_state:
-    st.session_state.db_manager = DatabaseManager()
-
-db = st.session_state.db_manager
+# Shared database manager (one per server process)
+db = get_db_manager()
 
 # Page header
 st.title("🔍 Search & Browse Residents")
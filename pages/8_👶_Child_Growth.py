@@ -5,124 +5,139 @@ Track growth metrics for children under 5 years with WHO growth charts.
 
 import streamlit as st
 from datetime import datetime, date
-import plotly.graph_objects as go
+import numpy as np
 import pandas as pd
-from database import DatabaseManager
+from database import get_db_manager
 from utils import check_authentication, get_current_user_name, select_resident_widget
+from utils.who_reference import WHO, reference_key, calculate_z_scores_vec, calculate_z_score_simple
 
 # Check authentication
 if not check_authentication():
     st.error("Please log in to access this page")
     st.stop()
 
-# Initialize database manager
-if 'db_manager' not in st.session_state:
-    st.session_state.db_manager = DatabaseManager()
-
-db = st.session_state.db_manager
+# Shared database manager (one per server process)
+db = get_db_manager()
 
 # Page header
 st.title("👶 Child Growth Monitoring")
 st.markdown("Track growth metrics for children under 5 years")
 st.markdown("---")
 
-# WHO Growth Standards Reference Data (simplified)
-# Boys Weight-for-Age (months: kg) - WHO standards
-WHO_BOYS_WEIGHT = {
-    0: {'p3': 2.5, 'p50': 3.3, 'p97': 4.4},
-    6: {'p3': 6.4, 'p50': 7.9, 'p97': 9.8},
-    12: {'p3': 7.7, 'p50': 9.6, 'p97': 12.0},
-    24: {'p3': 9.7, 'p50': 12.2, 'p97': 15.3},
-    36: {'p3': 11.3, 'p50': 14.3, 'p97': 18.3},
-    48: {'p3': 12.7, 'p50': 16.3, 'p97': 21.2},
-    60: {'p3': 14.1, 'p50': 18.3, 'p97': 24.2}
-}
-
-# Girls Weight-for-Age (months: kg)
-WHO_GIRLS_WEIGHT = {
-    0: {'p3': 2.4, 'p50': 3.2, 'p97': 4.2},
-    6: {'p3': 5.7, 'p50': 7.3, 'p97': 9.3},
-    12: {'p3': 7.0, 'p50': 9.0, 'p97': 11.5},
-    24: {'p3': 9.0, 'p50': 11.5, 'p97': 14.8},
-    36: {'p3': 10.8, 'p50': 13.9, 'p97': 18.1},
-    48: {'p3': 12.3, 'p50': 16.0, 'p97': 21.5},
-    60: {'p3': 13.7, 'p50': 18.2, 'p97': 25.0}
+# Immunization schedule for the assessment checklist: (section, ((key, label), ...))
+IMM_SCHEDULE = (
+    ("Birth (0 days)", (("bcg", "BCG"), ("opv_0", "OPV-0"), ("hep_b", "Hep-B"))),
+    ("6/10/14 Weeks", (("opv", "OPV"), ("penta", "Penta"), ("rota", "Rota"),
+                       ("fipv", "fIPV"), ("pcv", "PCV"))),
+    ("9-12 Months", (("mr1", "MR-1"), ("je1", "JE-1"), ("pcv_booster", "PCV Booster"))),
+    ("16-24 Months", (("mr2", "MR-2"), ("je2", "JE-2"), ("dpt_opv_booster", "DPT/OPV Booster"))),
+    ("5-6 Years", (("dpt2", "DPT Booster (5-6 yrs)"),)),
+)
+
+# Danger signs the mother can identify: (key, label)
+DANGER_SIGNS = (
+    ("convulsions", "Convulsions"),
+    ("unable_to_drink", "Unable to drink"),
+    ("vomits_everything", "Vomits everything"),
+    ("lethargy", "Lethargy / Unconscious"),
+    ("fast_breathing", "Fast Breathing"),
+)
+
+# Column order of a growth_monitoring record, and the measurement subset
+# carried forward onto assessment-only records
+_GROWTH_KEYS = ('resident_id', 'record_date', 'age_months', 'weight_kg', 'height_cm',
+                'muac_cm', 'head_circumference_cm', 'z_score_weight_age', 'notes')
+_MEASUREMENT_KEYS = _GROWTH_KEYS[2:-1]
+
+# Measurement history table: DataFrame column -> display label
+_HISTORY_COLUMNS = {
+    'date_str': 'Date', 'age_months': 'Age (months)', 'weight_kg': 'Weight (kg)',
+    'height_cm': 'Height (cm)', 'muac_cm': 'MUAC (cm)', 'muac_status': 'MUAC Status',
+    'z_score_weight_age': 'Z-score', 'status': 'Status', 'notes': 'Notes',
 }
 
-# Boys Height-for-Age (months: cm)
-WHO_BOYS_HEIGHT = {
-    0: {'p3': 46.1, 'p50': 49.9, 'p97': 53.7},
-    6: {'p3': 63.3, 'p50': 67.6, 'p97': 72.0},
-    12: {'p3': 71.0, 'p50': 75.7, 'p97': 80.5},
-    24: {'p3': 81.7, 'p50': 87.1, 'p97': 92.9},
-    36: {'p3': 88.7, 'p50': 96.1, 'p97': 103.3},
-    48: {'p3': 94.9, 'p50': 103.3, 'p97': 111.7},
-    60: {'p3': 100.7, 'p50': 110.0, 'p97': 119.2}
-}
+# Nutrition status cut-offs: a value falls in bin i of LABELS when it is at
+# least BOUNDS[i-1] and below BOUNDS[i]
+_Z_BOUNDS = np.array([-2.0, -1.0])
+_Z_LABELS = np.array(['Underweight', 'At Risk', 'Normal'])
+_MUAC_BOUNDS = np.array([11.5, 12.5])
+_MUAC_LABELS = np.array(['SAM', 'MAM', 'Normal'])
 
-# Girls Height-for-Age (months: cm)
-WHO_GIRLS_HEIGHT = {
-    0: {'p3': 45.4, 'p50': 49.1, 'p97': 52.9},
-    6: {'p3': 61.2, 'p50': 65.7, 'p97': 70.3},
-    12: {'p3': 68.9, 'p50': 74.0, 'p97': 79.2},
-    24: {'p3': 80.0, 'p50': 86.4, 'p97': 92.9},
-    36: {'p3': 87.4, 'p50': 95.1, 'p97': 102.7},
-    48: {'p3': 94.1, 'p50': 102.7, 'p97': 111.3},
-    60: {'p3': 99.9, 'p50': 109.4, 'p97': 118.9}
-}
+def _classify(values, bounds):
+    """Index of the status bin each value falls into (see _Z_BOUNDS / _MUAC_BOUNDS)."""
+    return np.searchsorted(bounds, values, side='right')
 
 
-def calculate_z_score_simple(value, age_months, gender, metric='weight'):
-    """Simple z-score approximation based on WHO standards."""
-    if metric == 'weight':
-        ref_data = WHO_BOYS_WEIGHT if gender == 'Male' else WHO_GIRLS_WEIGHT
-    else:
-        ref_data = WHO_BOYS_HEIGHT if gender == 'Male' else WHO_GIRLS_HEIGHT
+@st.cache_resource
+def _who_traces(gender):
+    """WHO p97/median/p3 reference traces for the weight and height charts."""
+    import plotly.graph_objects as go
     
-    # Find closest age in reference
-    closest_age = min(ref_data.keys(), key=lambda x: abs(x - age_months))
-    ref = ref_data[closest_age]
+    traces = {}
+    for metric in ('weight', 'height'):
+        key = reference_key(gender, metric)
+        traces[metric] = [
+            go.Scattergl(
+                x=WHO['ages'], y=WHO[key + ('p97',)],
+                mode='lines', name='WHO 97th %ile', line=dict(color='lightgreen', dash='dash')
+            ),
+            go.Scattergl(
+                x=WHO['ages'], y=WHO[key + ('p50',)],
+                mode='lines', name='WHO Median', line=dict(color='green', width=2)
+            ),
+            go.Scattergl(
+                x=WHO['ages'], y=WHO[key + ('p3',)],
+                mode='lines', name='WHO 3rd %ile', line=dict(color='orange', dash='dash')
+            ),
+        ]
+    return traces
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _load_growth(resident_id):
+    """Growth records for a child, cached across reruns until the next save."""
+    return db.get_child_growth_records(resident_id)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _growth_df(resident_id, gender):
+    """Date-sorted growth history DataFrame with LMS z-scores, cached across reruns."""
+    # Only the measurement columns are materialised; the nested
+    # assessment_data JSON is never needed here
+    df = pd.DataFrame(_load_growth(resident_id), columns=_GROWTH_KEYS[1:])
+    df['record_date'] = pd.to_datetime(df['record_date'], format='%Y-%m-%d', cache=True)
+    df = df.sort_values('record_date')
+    df['date_str'] = df['record_date'].values.astype('datetime64[D]').astype(str)
     
-    # Simple z-score: (value - median) / (p97 - p3) * 4
-    median = ref['p50']
-    sd_approx = (ref['p97'] - ref['p3']) / 4
+    # Recompute z-scores for the whole history in one pass so older
+    # records use the same LMS method as new ones
+    df['z_score_weight_age'] = np.round(
+        calculate_z_scores_vec(df['weight_kg'], df['age_months'], gender, 'weight'), 2
+    )
     
-    if sd_approx > 0:
-        z_score = (value - median) / sd_approx
-        return round(z_score, 2)
-    return 0
+    # Weight-for-age and MUAC status for every record, without per-row branching
+    z = df['z_score_weight_age'].to_numpy(dtype=float)
+    df['status'] = np.where(np.isnan(z), '', _Z_LABELS[_classify(z, _Z_BOUNDS)])
+    muac = df['muac_cm'].to_numpy(dtype=float)
+    df['muac_status'] = np.where(np.isnan(muac) | (muac <= 0), '',
+                                 _MUAC_LABELS[_classify(muac, _MUAC_BOUNDS)])
+    return df
 
 
-# Child Selection
-st.subheader("Select Child")
+def _clear_growth_cache():
+    """Invalidate cached growth data after a new record is saved."""
+    _load_growth.clear()
+    _growth_df.clear()
 
-# Use the new search-to-select widget for children
-selected_child = select_resident_widget(db, key_prefix="child_growth")
 
-if not selected_child:
-    st.info("Search for a child (under 5 years) to start tracking growth.")
-    st.stop()
+# ==================== TAB FRAGMENTS ====================
+# Each tab body is a fragment so widget interaction inside one tab only
+# reruns that tab instead of the whole page.
 
-# Validate age
-if selected_child.get('age') is None or selected_child.get('age') > 5:
-    st.warning(f"⚠️ {selected_child['name']} is not in the child age group (under 5 years). Please select a different resident.")
-    st.stop()
 
-# Display child info
-col1, col2, col3 = st.columns(3)
-with col1:
-    st.metric("Name", selected_child['name'])
-with col2:
-    st.metric("Age", f"{selected_child.get('age', 'N/A')} years")
-with col3:
-    st.metric("Gender", selected_child.get('gender', 'N/A'))
-
-st.markdown("---")
-
-# Two tabs: Data Entry and Growth Charts
-tab1, tab2, tab3 = st.tabs(["📝 Record Growth Data", "📊 Growth Charts & History", "📋 Child Assessment Checklist"])
-
-with tab1:
+@st.fragment
+def _record_growth_tab(selected_child):
+    """Form for recording a new growth measurement."""
     st.subheader("Record New Growth Measurement")
     
     with st.form("growth_form"):
@@ -152,91 +167,81 @@ with tab1:
                     weight_kg, age_months, selected_child.get('gender', 'Male'), 'weight'
                 )
                 
-                growth_data = {
-                    'resident_id': selected_child['unique_id'],
-                    'record_date': record_date.strftime('%Y-%m-%d'),
-                    'age_months': age_months,
-                    'weight_kg': weight_kg,
-                    'height_cm': height_cm,
-                    'muac_cm': muac_cm if muac_cm > 0 else None,
-                    'head_circumference_cm': head_circumference_cm if head_circumference_cm > 0 else None,
-                    'z_score_weight_age': z_score,
-                    'notes': notes if notes else None
-                }
+                growth_data = dict(zip(_GROWTH_KEYS, (
+                    selected_child['unique_id'],
+                    record_date.isoformat(),
+                    age_months,
+                    weight_kg,
+                    height_cm,
+                    muac_cm if muac_cm > 0 else None,
+                    head_circumference_cm if head_circumference_cm > 0 else None,
+                    z_score,
+                    notes if notes else None
+                )))
                 
                 if db.add_growth_monitoring(growth_data):
+                    _clear_growth_cache()
                     st.success("✅ Growth record saved successfully!")
                     
                     # Show alerts
-                    if z_score < -2:
+                    level = _classify(z_score, _Z_BOUNDS)
+                    if level == 0:
                         st.error("⚠️ ALERT: Child is Underweight (Z-score < -2)")
-                    elif z_score < -1:
+                    elif level == 1:
                         st.warning("⚠️ Warning: Child is at risk of underweight (Z-score < -1)")
                     else:
                         st.info("✓ Weight is within normal range")
                     
                     # MUAC alert
-                    if muac_cm > 0 and muac_cm < 11.5:
+                    level = _classify(muac_cm, _MUAC_BOUNDS) if muac_cm > 0 else None
+                    if level == 0:
                         st.error("⚠️ ALERT: Severe Acute Malnutrition (MUAC < 11.5 cm)")
-                    elif muac_cm > 0 and muac_cm < 12.5:
+                    elif level == 1:
                         st.warning("⚠️ Warning: Moderate Acute Malnutrition (MUAC < 12.5 cm)")
                     
-                    st.rerun()
+                    st.rerun(scope="fragment")
                 else:
                     st.error("Failed to save growth record")
 
-with tab2:
+
+@st.fragment
+def _growth_charts_tab(selected_child):
+    """WHO growth charts, measurement history and latest status."""
     st.subheader("Growth Charts & History")
     
     # Get growth history
-    growth_records = db.get_child_growth_records(selected_child['unique_id'])
+    growth_records = _load_growth(selected_child['unique_id'])
     
     if not growth_records:
         st.info("No growth records found for this child. Add measurements in the 'Record Growth Data' tab.")
     else:
-        # Convert to DataFrame
-        df = pd.DataFrame(growth_records)
-        df['record_date'] = pd.to_datetime(df['record_date'])
-        df = df.sort_values('record_date')
+        # Plotly is only needed once there is something to chart
+        import plotly.graph_objects as go
         
-        # WHO reference data for plotting
         gender = selected_child.get('gender', 'Male')
-        who_weight_ref = WHO_BOYS_WEIGHT if gender == 'Male' else WHO_GIRLS_WEIGHT
-        who_height_ref = WHO_BOYS_HEIGHT if gender == 'Male' else WHO_GIRLS_HEIGHT
+        df = _growth_df(selected_child['unique_id'], gender)
+        
+        # WHO reference lines for plotting
+        who_traces = _who_traces(gender)
         
         # Weight-for-Age Chart
         st.markdown("### Weight-for-Age Chart")
         
-        fig_weight = go.Figure()
-        
-        # Add WHO reference lines
-        who_ages = sorted(who_weight_ref.keys())
-        fig_weight.add_trace(go.Scatter(
-            x=who_ages, y=[who_weight_ref[a]['p97'] for a in who_ages],
-            mode='lines', name='WHO 97th %ile', line=dict(color='lightgreen', dash='dash')
-        ))
-        fig_weight.add_trace(go.Scatter(
-            x=who_ages, y=[who_weight_ref[a]['p50'] for a in who_ages],
-            mode='lines', name='WHO Median', line=dict(color='green', width=2)
-        ))
-        fig_weight.add_trace(go.Scatter(
-            x=who_ages, y=[who_weight_ref[a]['p3'] for a in who_ages],
-            mode='lines', name='WHO 3rd %ile', line=dict(color='orange', dash='dash')
-        ))
-        
-        # Add child's actual measurements
-        fig_weight.add_trace(go.Scatter(
-            x=df['age_months'], y=df['weight_kg'],
-            mode='lines+markers', name='Child Weight',
-            line=dict(color='blue', width=3), marker=dict(size=10)
-        ))
-        
-        fig_weight.update_layout(
-            title=f"Weight-for-Age: {selected_child['name']}",
-            xaxis_title="Age (months)",
-            yaxis_title="Weight (kg)",
-            hovermode='x unified',
-            height=400
+        # WHO reference lines plus the child's actual measurements
+        fig_weight = go.Figure(
+            data=who_traces['weight'] + [go.Scattergl(
+                x=df['age_months'], y=df['weight_kg'],
+                mode='lines+markers', name='Child Weight',
+                line=dict(color='blue', width=3), marker=dict(size=10)
+            )],
+            layout=go.Layout(
+                title=f"Weight-for-Age: {selected_child['name']}",
+                xaxis_title="Age (months)",
+                yaxis_title="Weight (kg)",
+                hovermode='x unified',
+                uirevision='growth',
+                height=400
+            )
         )
         
         st.plotly_chart(fig_weight, use_container_width=True)
@@ -244,35 +249,21 @@ with tab2:
         # Height-for-Age Chart
         st.markdown("### Height-for-Age Chart")
         
-        fig_height = go.Figure()
-        
-        # Add WHO reference lines
-        fig_height.add_trace(go.Scatter(
-            x=who_ages, y=[who_height_ref[a]['p97'] for a in who_ages],
-            mode='lines', name='WHO 97th %ile', line=dict(color='lightgreen', dash='dash')
-        ))
-        fig_height.add_trace(go.Scatter(
-            x=who_ages, y=[who_height_ref[a]['p50'] for a in who_ages],
-            mode='lines', name='WHO Median', line=dict(color='green', width=2)
-        ))
-        fig_height.add_trace(go.Scatter(
-            x=who_ages, y=[who_height_ref[a]['p3'] for a in who_ages],
-            mode='lines', name='WHO 3rd %ile', line=dict(color='orange', dash='dash')
-        ))
-        
-        # Add child's actual measurements
-        fig_height.add_trace(go.Scatter(
-            x=df['age_months'], y=df['height_cm'],
-            mode='lines+markers', name='Child Height',
-            line=dict(color='blue', width=3), marker=dict(size=10)
-        ))
-        
-        fig_height.update_layout(
-            title=f"Height-for-Age: {selected_child['name']}",
-            xaxis_title="Age (months)",
-            yaxis_title="Height (cm)",
-            hovermode='x unified',
-            height=400
+        # WHO reference lines plus the child's actual measurements
+        fig_height = go.Figure(
+            data=who_traces['height'] + [go.Scattergl(
+                x=df['age_months'], y=df['height_cm'],
+                mode='lines+markers', name='Child Height',
+                line=dict(color='blue', width=3), marker=dict(size=10)
+            )],
+            layout=go.Layout(
+                title=f"Height-for-Age: {selected_child['name']}",
+                xaxis_title="Age (months)",
+                yaxis_title="Height (cm)",
+                hovermode='x unified',
+                uirevision='growth',
+                height=400
+            )
         )
         
         st.plotly_chart(fig_height, use_container_width=True)
@@ -280,38 +271,40 @@ with tab2:
         # Growth History Table
         st.markdown("### Measurement History")
         
-        display_df = df[['record_date', 'age_months', 'weight_kg', 'height_cm', 
-                         'muac_cm', 'z_score_weight_age', 'notes']].copy()
-        display_df.columns = ['Date', 'Age (months)', 'Weight (kg)', 'Height (cm)', 
-                              'MUAC (cm)', 'Z-score', 'Notes']
-        display_df['Date'] = display_df['Date'].dt.strftime('%Y-%m-%d')
-        
-        st.dataframe(display_df.sort_values('Date', ascending=False), use_container_width=True, hide_index=True)
+        # df is already date-sorted ascending; show newest first without re-sorting,
+        # letting column_config pick and label the columns instead of copying them
+        st.dataframe(df.iloc[::-1], use_container_width=True, hide_index=True,
+                     column_order=list(_HISTORY_COLUMNS), column_config=_HISTORY_COLUMNS)
         
         # Latest Status Summary
         st.markdown("### Latest Status")
-        latest = df.iloc[-1]
+        latest_weight = df['weight_kg'].iat[-1]
+        latest_height = df['height_cm'].iat[-1]
+        latest_muac = df['muac_cm'].iat[-1]
+        latest_status = df['status'].iat[-1]
         
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("Weight", f"{latest['weight_kg']:.1f} kg")
+            st.metric("Weight", f"{latest_weight:.1f} kg")
         with col2:
-            st.metric("Height", f"{latest['height_cm']:.1f} cm")
+            st.metric("Height", f"{latest_height:.1f} cm")
         with col3:
-            if latest['muac_cm']:
-                st.metric("MUAC", f"{latest['muac_cm']:.1f} cm")
+            if latest_muac:
+                st.metric("MUAC", f"{latest_muac:.1f} cm")
             else:
                 st.metric("MUAC", "N/A")
         with col4:
-            z_score_val = latest['z_score_weight_age']
-            if z_score_val < -2:
+            if latest_status == 'Underweight':
                 st.metric("Status", "Underweight ⚠️", delta_color="off")
-            elif z_score_val < -1:
+            elif latest_status == 'At Risk':
                 st.metric("Status", "At Risk", delta_color="off")
             else:
                 st.metric("Status", "Normal ✓", delta_color="off")
 
-with tab3:
+
+@st.fragment
+def _assessment_tab(selected_child):
+    """Under-5 child assessment checklist form."""
     st.subheader("Under-5 Child Assessment Checklist")
     st.markdown("Complete the comprehensive assessment form and save to the latest growth record.")
 
@@ -360,48 +353,12 @@ with tab3:
 
         # --- Immunization ---
         with st.expander("💉 Immunization"):
-            st.markdown("**Birth (0 days)**")
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                bcg = st.checkbox("BCG")
-            with col2:
-                opv0 = st.checkbox("OPV-0")
-            with col3:
-                hep_b = st.checkbox("Hep-B")
-
-            st.markdown("**6/10/14 Weeks**")
-            col1, col2, col3, col4, col5 = st.columns(5)
-            with col1:
-                opv = st.checkbox("OPV")
-            with col2:
-                penta = st.checkbox("Penta")
-            with col3:
-                rota = st.checkbox("Rota")
-            with col4:
-                fipv = st.checkbox("fIPV")
-            with col5:
-                pcv = st.checkbox("PCV")
-
-            st.markdown("**9-12 Months**")
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                mr1 = st.checkbox("MR-1")
-            with col2:
-                je1 = st.checkbox("JE-1")
-            with col3:
-                pcv_booster = st.checkbox("PCV Booster")
-
-            st.markdown("**16-24 Months**")
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                mr2 = st.checkbox("MR-2")
-            with col2:
-                je2 = st.checkbox("JE-2")
-            with col3:
-                dpt_opv_booster = st.checkbox("DPT/OPV Booster")
-
-            st.markdown("**5-6 Years**")
-            dpt2 = st.checkbox("DPT Booster (5-6 yrs)")
+            immunization = {}
+            for section, vaccines in IMM_SCHEDULE:
+                st.markdown(f"**{section}**")
+                for col, (key, label) in zip(st.columns(len(vaccines)), vaccines):
+                    with col:
+                        immunization[key] = st.checkbox(label, key=f"imm_{key}")
 
         # --- Counseling & Action ---
         with st.expander("📣 Counseling & Action"):
@@ -411,11 +368,8 @@ with tab3:
                 counseling_given = st.radio("Counseling Given", ["Yes", "No"], horizontal=True)
             with col2:
                 st.markdown("**Mother Identifies Danger Signs:**")
-                ds_convulsions = st.checkbox("Convulsions")
-                ds_unable_drink = st.checkbox("Unable to drink")
-                ds_vomits = st.checkbox("Vomits everything")
-                ds_lethargy = st.checkbox("Lethargy / Unconscious")
-                ds_fast_breathing = st.checkbox("Fast Breathing")
+                danger_signs = {key: st.checkbox(label, key=f"ds_{key}")
+                                for key, label in DANGER_SIGNS}
 
         submitted_assessment = st.form_submit_button("💾 Save Assessment", use_container_width=True)
 
@@ -446,29 +400,17 @@ with tab3:
                     "ifa": ifa,
                     "deworming": deworming
                 },
-                "immunization": {
-                    "bcg": bcg, "opv_0": opv0, "hep_b": hep_b,
-                    "opv": opv, "penta": penta, "rota": rota, "fipv": fipv, "pcv": pcv,
-                    "mr1": mr1, "je1": je1, "pcv_booster": pcv_booster,
-                    "mr2": mr2, "je2": je2, "dpt_opv_booster": dpt_opv_booster,
-                    "dpt2": dpt2
-                },
+                "immunization": immunization,
                 "counseling_action": {
                     "referral": referral,
                     "counseling_given": counseling_given,
-                    "danger_signs_identified": {
-                        "convulsions": ds_convulsions,
-                        "unable_to_drink": ds_unable_drink,
-                        "vomits_everything": ds_vomits,
-                        "lethargy": ds_lethargy,
-                        "fast_breathing": ds_fast_breathing
-                    }
+                    "danger_signs_identified": danger_signs
                 }
             }
 
             # Save as a new growth monitoring record carrying only assessment_data
             record_date = date.today()
-            existing_records = db.get_child_growth_records(selected_child['unique_id'])
+            existing_records = _load_growth(selected_child['unique_id'])
 
             if existing_records:
                 # Attach assessment_data to the most recent record by creating a new record
@@ -476,28 +418,62 @@ with tab3:
                 latest = existing_records[0]
                 assessment_record = {
                     'resident_id': selected_child['unique_id'],
-                    'record_date': record_date.strftime('%Y-%m-%d'),
-                    'age_months': latest.get('age_months'),
-                    'weight_kg': latest.get('weight_kg'),
-                    'height_cm': latest.get('height_cm'),
-                    'muac_cm': latest.get('muac_cm'),
-                    'head_circumference_cm': latest.get('head_circumference_cm'),
-                    'z_score_weight_age': latest.get('z_score_weight_age'),
+                    'record_date': record_date.isoformat(),
+                    **{key: latest.get(key) for key in _MEASUREMENT_KEYS},
                     'notes': 'Assessment checklist record',
                     'assessment_data': assessment_data
                 }
             else:
                 assessment_record = {
                     'resident_id': selected_child['unique_id'],
-                    'record_date': record_date.strftime('%Y-%m-%d'),
+                    'record_date': record_date.isoformat(),
                     'notes': 'Assessment checklist record',
                     'assessment_data': assessment_data
                 }
 
             if db.add_growth_monitoring(assessment_record):
+                _clear_growth_cache()
                 st.success("✅ Child assessment checklist saved successfully!")
                 if referral != "None":
                     st.warning(f"⚠️ Referral to {referral} recommended.")
             else:
                 st.error("❌ Failed to save assessment. Please try again.")
 
+
+# Child Selection
+st.subheader("Select Child")
+
+# Use the new search-to-select widget for children
+selected_child = select_resident_widget(db, key_prefix="child_growth")
+
+if not selected_child:
+    st.info("Search for a child (under 5 years) to start tracking growth.")
+    st.stop()
+
+# Validate age
+if selected_child.get('age') is None or selected_child.get('age') > 5:
+    st.warning(f"⚠️ {selected_child['name']} is not in the child age group (under 5 years). Please select a different resident.")
+    st.stop()
+
+# Display child info
+col1, col2, col3 = st.columns(3)
+with col1:
+    st.metric("Name", selected_child['name'])
+with col2:
+    st.metric("Age", f"{selected_child.get('age', 'N/A')} years")
+with col3:
+    st.metric("Gender", selected_child.get('gender', 'N/A'))
+
+st.markdown("---")
+
+# Views: Data Entry, Growth Charts and Assessment Checklist.
+# Only the selected view is executed on a rerun, unlike st.tabs which runs
+# every tab body (and builds the charts) even when it is hidden
+_VIEWS = {
+    "📝 Record Growth Data": _record_growth_tab,
+    "📊 Growth Charts & History": _growth_charts_tab,
+    "📋 Child Assessment Checklist": _assessment_tab,
+}
+view = st.radio("View", list(_VIEWS), horizontal=True, label_visibility="collapsed",
+                key="child_growth_view")
+_VIEWS[view](selected_child)
@@ -4,21 +4,24 @@ Track Antenatal Care (ANC) and Postnatal Care (PNC) visits.
 """
 
 import streamlit as st
-from datetime import datetime, date, timedelta
-import uuid
-from database import DatabaseManager
-from utils import check_authentication, get_current_user_name, select_resident_widget
+from datetime import datetime, date
+import secrets
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from database import get_db_manager
+from database.db_manager import (ANEMIA_THRESHOLD_HB, HYPERTENSION_THRESHOLD_DIASTOLIC,
+                                 HYPERTENSION_THRESHOLD_SYSTOLIC)
+from utils import (check_authentication, get_current_user_name, select_resident_widget,
+                   calculate_edd, calculate_gestational_age)
 
 # Check authentication
 if not check_authentication():
     st.error("Please log in to access this page")
     st.stop()
 
-# Initialize database manager
-if 'db_manager' not in st.session_state:
-    st.session_state.db_manager = DatabaseManager()
-
-db = st.session_state.db_manager
+# Shared database manager (one per server process)
+db = get_db_manager()
 
 # Page header
 st.title("🤰 Maternal Health Tracking")
@@ -26,70 +29,236 @@ st.markdown("Antenatal Care (ANC) and Postnatal Care (PNC) Management")
 st.markdown("---")
 
 
-def calculate_edd(lmp_date):
-    """Calculate Expected Date of Delivery using Naegele's rule (LMP + 280 days)."""
-    if lmp_date:
-        edd = lmp_date + timedelta(days=280)
-        return edd
-    return None
-
-
-def calculate_gestational_age(lmp_date, visit_date):
-    """Calculate gestational age in weeks."""
-    if lmp_date and visit_date:
-        delta = visit_date - lmp_date
-        weeks = delta.days // 7
-        return weeks
-    return None
-
-
-# Mother Selection
-st.subheader("Select Mother")
-
-# Use the new search-to-select widget for mothers
-selected_mother = select_resident_widget(db, key_prefix="maternal_health")
-
-if not selected_mother:
-    st.info("Search for a female resident (age 15-45) to manage maternal health records.")
-    st.stop()
-
-# Validate gender and age
-if selected_mother.get('gender') != 'Female':
-    st.warning(f"⚠️ {selected_mother['name']} is not female. Please select a female resident.")
-    st.stop()
-
-age = selected_mother.get('age')
-if age is not None and (age < 15 or age > 45):
-    st.warning(f"⚠️ {selected_mother['name']} is not in the typical reproductive age range (15-45 years). You can still proceed, but this is outside the normal range.")
-
-
-# Display mother info
-col1, col2, col3 = st.columns(3)
-with col1:
-    st.metric("Name", selected_mother['name'])
-with col2:
-    st.metric("Age", f"{selected_mother.get('age', 'N/A')} years")
-with col3:
-    st.metric("ID", selected_mother['unique_id'])
-
-st.markdown("---")
-
-# Three tabs: ANC, PNC, and High-Risk Dashboard
-tab1, tab2, tab3, tab4 = st.tabs(["🤰 Antenatal Care (ANC)", "👶 Postnatal Care (PNC)", "⚠️ High-Risk Mothers", "📋 MCH Proforma"])
-
-with tab1:
+# Columns used by the ANC/PNC tabs; the MCH proforma's assessment_data
+# payload is never read here, so it is not fetched
+_MATERNAL_COLUMNS = ('visit_type', 'pregnancy_id', 'visit_date', 'lmp_date', 'gestational_week',
+                     'bp_systolic', 'hemoglobin', 'fetal_heart_rate', 'tt_dose', 'danger_signs',
+                     'delivery_outcome')
+
+# Most recent visits loaded for the history tables and pregnancy selector
+_MATERNAL_HISTORY_LIMIT = 100
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _load_maternal(resident_id):
+    """Maternal health records for a mother, cached across reruns until the next save."""
+    return db.get_maternal_health_records(resident_id, columns=','.join(_MATERNAL_COLUMNS),
+                                          limit=_MATERNAL_HISTORY_LIMIT)
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _load_high_risk():
+    """High-risk mothers list, cached across reruns until the next save."""
+    return db.get_high_risk_mothers()
+
+
+# Initial values of the ANC/PNC vitals inputs, seeded into session_state once
+# so reruns reuse the stored widget state instead of passing value= each time
+ANC_FORM_DEFAULTS = {'anc_fundal_height': 0.0, 'anc_fhr': 0, 'anc_bp_sys': 120, 'anc_bp_dia': 80,
+                     'anc_hb': 0.0, 'anc_tt_dose': 0}
+PNC_FORM_DEFAULTS = {'pnc_bp_sys': 120, 'pnc_bp_dia': 80, 'pnc_hb': 0.0}
+# Every widget key of each form, dropped after a successful save so the form
+# starts empty again (input is kept when validation or the save fails)
+ANC_FORM_KEYS = (*ANC_FORM_DEFAULTS, 'anc_visit_date', 'anc_urine_albumin', 'anc_calcium_iron',
+                 'anc_danger_signs')
+PNC_FORM_KEYS = (*PNC_FORM_DEFAULTS, 'pnc_date', 'pnc_preg_id', 'delivery_date', 'delivery_outcome',
+                 'pnc_danger')
+
+
+def _reset_form(flag, keys, defaults):
+    """Before a form is drawn: clear it if the last submit saved, then seed defaults."""
+    if st.session_state.pop(flag, False):
+        for key in keys:
+            st.session_state.pop(key, None)
+    for key, value in defaults.items():
+        st.session_state.setdefault(key, value)
+
+
+def _show_save_alerts(alerts_key):
+    """Show risk alerts stored by the save that triggered this rerun."""
+    for alert in st.session_state.pop(alerts_key, ()):
+        st.error(alert)
+
+# Risk rules: (label, check, alert). Checks take vitals with missing values
+# filled (numbers 0, text '') and work on single values or DataFrame columns,
+# so the save alerts and the high-risk dashboard share one definition; the
+# ANC thresholds match the filter in DatabaseManager.get_high_risk_mothers.
+ANC_RISK_RULES = (
+    ('High BP', lambda v: ((v['bp_systolic'] >= HYPERTENSION_THRESHOLD_SYSTOLIC)
+                           | (v['bp_diastolic'] >= HYPERTENSION_THRESHOLD_DIASTOLIC)),
+     "⚠️ ALERT: High Blood Pressure detected! Immediate referral recommended."),
+    ('Anemia', lambda v: (v['hemoglobin'] > 0) & (v['hemoglobin'] < ANEMIA_THRESHOLD_HB),
+     "⚠️ ALERT: Anemia detected! (Hb < 11 g/dL)"),
+    ('Danger Signs', lambda v: v['danger_signs'] != '',
+     "⚠️ ALERT: Danger signs reported! Immediate attention required."),
+)
+# Pre-joined "Risk Factors" text for every combination of ANC rules, indexed
+# by the bitmask of the rules that matched (bit i = ANC_RISK_RULES[i])
+RISK_LUT = np.array([
+    ', '.join(label for bit, (label, _, _) in enumerate(ANC_RISK_RULES) if mask >> bit & 1)
+    for mask in range(1 << len(ANC_RISK_RULES))
+])
+PNC_RISK_RULES = (
+    ('High BP', lambda v: v['bp_systolic'] >= HYPERTENSION_THRESHOLD_SYSTOLIC,
+     "⚠️ ALERT: High Blood Pressure postpartum!"),
+    ('Severe Anemia', lambda v: (v['hemoglobin'] > 0) & (v['hemoglobin'] < 10),
+     "⚠️ ALERT: Severe Anemia postpartum! (Hb < 10 g/dL)"),
+    ('Danger Signs', lambda v: v['danger_signs'] != '',
+     "⚠️ ALERT: Danger signs reported! Immediate attention required."),
+)
+
+# Visit history tables: record column -> display label (column_order/column_config)
+ANC_COLUMNS = {
+    'pregnancy_id': 'Pregnancy ID', 'visit_date': 'Visit Date', 'gestational_week': 'Gestational Week',
+    'bp_systolic': 'BP Systolic', 'hemoglobin': 'Hb (g/dL)', 'fetal_heart_rate': 'FHR (bpm)',
+    'tt_dose': 'TT Dose', 'danger_signs': 'Danger Signs',
+}
+PNC_COLUMNS = {
+    'visit_date': 'Visit Date', 'bp_systolic': 'BP Systolic', 'hemoglobin': 'Hb (g/dL)',
+    'delivery_outcome': 'Delivery Outcome', 'danger_signs': 'Danger Signs',
+}
+# Arrow schemas for those tables (text unless listed), so the history is
+# handed to st.dataframe as a pyarrow Table without building a DataFrame
+_HISTORY_TYPES = {'gestational_week': pa.int32(), 'bp_systolic': pa.int32(), 'hemoglobin': pa.float64(),
+                  'fetal_heart_rate': pa.int32(), 'tt_dose': pa.int32()}
+ANC_SCHEMA = pa.schema([(col, _HISTORY_TYPES.get(col, pa.string())) for col in ANC_COLUMNS])
+PNC_SCHEMA = pa.schema([(col, _HISTORY_TYPES.get(col, pa.string())) for col in PNC_COLUMNS])
+
+# Fields of a high-risk record shown on the dashboard
+_HIGH_RISK_COLUMNS = ['resident_name', 'resident_id', 'visit_date', 'gestational_week',
+                      'bp_systolic', 'bp_diastolic', 'hemoglobin', 'danger_signs']
+# Missing-value defaults for those fields (Hb 0 means "not recorded")
+HIGH_RISK_DEFAULTS = {'resident_name': 'Unknown', 'resident_id': '', 'visit_date': '',
+                      'bp_systolic': 0, 'bp_diastolic': 0, 'hemoglobin': 0, 'danger_signs': ''}
+
+
+def _clear_maternal_cache():
+    """Invalidate cached maternal data after a record is saved."""
+    _load_maternal.clear()
+    _load_high_risk.clear()
+
+
+def _visit_frame(resident_id, visit_type):
+    """The mother's visits of one type (newest first) as a DataFrame."""
+    records = _load_maternal(resident_id)
+    if not records:
+        return pd.DataFrame()
+    df_maternal = pd.DataFrame.from_records(records, columns=_MATERNAL_COLUMNS)
+    return df_maternal[df_maternal['visit_type'].eq(visit_type)]
+
+
+def _history_table(resident_id, visit_type, schema):
+    """The mother's visits of one type (newest first) as a pyarrow Table."""
+    return pa.Table.from_pylist(
+        [r for r in _load_maternal(resident_id) if r.get('visit_type') == visit_type],
+        schema=schema)
+
+
+# MCH proforma layout: (section, expander title, columns), each column a tuple
+# of fields. A field is (key, label, options) for a horizontal radio, or
+# (key, label, widget, kwargs) for any other input; callable kwargs (such as
+# date.today) are evaluated when the widget is drawn.
+_YES_NO = ("Yes", "No")
+_DONE = ("Done", "Not Done")
+_GIVEN = ("Given", "Not Given")
+MCH_SPEC = (
+    ("early_registration", "📋 Early Registration", (
+        (("mcp_card_available", "MCP Card Available", _YES_NO),
+         ("issued_1st_trimester", "Issued in 1st Trimester", _YES_NO),
+         ("registered_lt12_weeks", "Registered <12 Weeks", _YES_NO)),
+        (("lmp", "LMP Date", st.date_input, {"value": None, "max_value": date.today}),
+         ("edd", "EDD (Expected Delivery Date)", st.date_input, {"value": None}),
+         ("mcts_rch_id", "MCTS / RCH ID", st.text_input, {"placeholder": "Enter ID"})),
+    )),
+    ("anc_coverage", "🏥 ANC Coverage", (
+        (("min_4_visits_completed", "Minimum 4 ANC Visits Completed", _YES_NO),),
+        (("trimester_weight_gain_recorded", "Trimester-wise Weight Gain Recorded", _YES_NO),),
+    )),
+    ("ifa_calcium", "💊 IFA & Calcium", (
+        (("ifa_start_date", "IFA Start Date", st.date_input, {"value": None}),
+         ("ifa_total_tablets", "Total IFA Tablets (>=180 recommended)", st.number_input,
+          {"min_value": 0, "max_value": 500, "value": 0}),
+         ("ifa_compliance", "IFA Compliance", ("Good", "Irregular", "Not taken"))),
+        (("ifa_side_effects", "IFA Side Effects (if any)", st.text_input,
+          {"placeholder": "e.g., Nausea, constipation"}),
+         ("calcium_issued", "Calcium Issued", _YES_NO)),
+    )),
+    ("investigations", "🔬 Investigations", (
+        (("urine_albumin", "Urine Albumin", _DONE),
+         ("urine_sugar", "Urine Sugar", _DONE),
+         ("blood_group", "Blood Group", _DONE),
+         ("hiv", "HIV Test", _DONE),
+         ("syphilis", "Syphilis Test", _DONE)),
+        (("usg", "USG (Ultrasound)", _DONE),
+         ("gdm", "GDM Screening", _DONE),
+         ("hbsag", "HBsAg", _DONE),
+         ("tsh", "TSH", _DONE),
+         ("blood_sugar", "Blood Sugar", _DONE)),
+    )),
+    ("immunization_td", "💉 Immunization (Td)", (
+        (("td1", "Td-1", _GIVEN),),
+        (("td2", "Td-2", _GIVEN),),
+        (("td_booster", "Td Booster", _GIVEN),),
+    )),
+    ("birth_preparedness", "🏠 Birth Preparedness", (
+        (("birth_place_identified", "Delivery Place Identified", _YES_NO),
+         ("transport_identified", "Transport Identified", _YES_NO),
+         ("emergency_contact", "Emergency Contact Identified", _YES_NO)),
+        (("blood_donor_identified", "Blood Donor Identified", _YES_NO),
+         ("knows_gt3_danger_signs", "Knows >3 Danger Signs", _YES_NO)),
+    )),
+    ("incentives_pnc", "🎁 Incentives & PNC", (
+        (("pmmvy_received", "PMMVY Received", _YES_NO),
+         ("jsy_received", "JSY Received", _YES_NO)),
+        (("pnc_day3", "PNC Visit Day 3", _DONE),
+         ("pnc_day7", "PNC Visit Day 7", _DONE),
+         ("pnc_day14", "PNC Visit Day 14", _DONE),
+         ("pnc_day42", "PNC Visit Day 42", _DONE),
+         ("postnatal_ifa", "Postnatal IFA", _GIVEN),
+         ("postnatal_calcium", "Postnatal Calcium", _GIVEN)),
+    )),
+    ("baby_0_6_months", "👶 Baby (0-6 Months)", (
+        (("early_bf_initiation", "Early Initiation of Breastfeeding", _YES_NO),
+         ("exclusive_breastfeeding", "Exclusive Breastfeeding (6 months)", _YES_NO)),
+        (("hbnc_visits_done", "HBNC Visits Done", _YES_NO),),
+    )),
+)
+
+
+def _mch_field(section, field):
+    """Draw one MCH_SPEC field and return its value."""
+    key, label, *spec = field
+    widget_key = f"mch_{section}_{key}"
+    if len(spec) == 1:
+        return st.radio(label, spec[0], horizontal=True, key=widget_key)
+    widget, kwargs = spec
+    kwargs = {name: value() if callable(value) else value for name, value in kwargs.items()}
+    return widget(label, key=widget_key, **kwargs)
+
+
+def _mch_value(value):
+    """Convert an MCH widget value for storage: dates as ISO strings, blank text as None."""
+    if isinstance(value, date):
+        return value.isoformat()
+    return value if value != "" else None
+
+
+# ==================== TAB FRAGMENTS ====================
+
+@st.fragment
+def _anc_tab(selected_mother):
+    """Antenatal care visit form and ANC history."""
     st.subheader("Antenatal Care (ANC) Visit")
+    df_anc = _visit_frame(selected_mother['unique_id'], 'ANC')
 
-    # Fetch existing ANC records to allow linking subsequent visits to the same pregnancy
-    _all_maternal_records = db.get_maternal_health_records(selected_mother['unique_id'])
-    _existing_anc = [r for r in _all_maternal_records if r.get('visit_type') == 'ANC']
-
+    # Existing ANC pregnancies allow linking subsequent visits to the same pregnancy.
     # Build ordered dict of unique pregnancy IDs with their LMP dates
     _existing_pregnancies = {}
-    for _r in _existing_anc:
-        _pid = _r.get('pregnancy_id')
-        if _pid and _pid not in _existing_pregnancies:
-            _existing_pregnancies[_pid] = _r.get('lmp_date')
+    if not df_anc.empty:
+        _preg = df_anc.loc[df_anc['pregnancy_id'].fillna('').ne(''), ['pregnancy_id', 'lmp_date']]
+        _preg = _preg.drop_duplicates('pregnancy_id').astype(object)
+        _existing_pregnancies = dict(zip(_preg['pregnancy_id'],
+                                         _preg['lmp_date'].where(_preg['lmp_date'].notna(), None)))
 
     # Pregnancy selector (outside the form so it can drive form defaults)
     _preg_options = ["➕ New Pregnancy"] + [
@@ -107,7 +276,7 @@ with tab1:
     if _selected_preg_option == "➕ New Pregnancy":
         _new_preg_key = f"new_preg_id_{selected_mother['unique_id']}"
         if _new_preg_key not in st.session_state:
-            st.session_state[_new_preg_key] = f"PREG-{uuid.uuid4().hex[:8].upper()}"
+            st.session_state[_new_preg_key] = f"PREG-{secrets.token_hex(4).upper()}"
         _current_pregnancy_id = st.session_state[_new_preg_key]
         _default_lmp = None
     else:
@@ -115,12 +284,16 @@ with tab1:
         _lmp_str = _existing_pregnancies.get(_current_pregnancy_id)
         _default_lmp = datetime.strptime(_lmp_str, '%Y-%m-%d').date() if _lmp_str else None
 
+    _reset_form('_anc_saved', ANC_FORM_KEYS, ANC_FORM_DEFAULTS)
+    _show_save_alerts('_anc_alerts')
+
     with st.form("anc_form"):
         col1, col2 = st.columns(2)
         
         with col1:
             st.markdown("**Basic Information**")
-            visit_date = st.date_input("Visit Date", value=date.today(), max_value=date.today())
+            visit_date = st.date_input("Visit Date", value=date.today(), max_value=date.today(),
+                                       key="anc_visit_date")
             
             # Show pregnancy ID (pre-filled from selection; user may still edit for new pregnancies)
             pregnancy_id = st.text_input("Pregnancy ID", value=_current_pregnancy_id,
@@ -128,13 +301,14 @@ with tab1:
             
             lmp_date = st.date_input("Last Menstrual Period (LMP)", 
                                     value=_default_lmp, 
-                                    max_value=date.today())
+                                    max_value=date.today(),
+                                    key=f"anc_lmp_{_current_pregnancy_id}")
             
             # Calculate EDD automatically
             if lmp_date:
                 edd = calculate_edd(lmp_date)
                 gestational_week = calculate_gestational_age(lmp_date, visit_date)
-                st.info(f"📅 Calculated EDD: **{edd.strftime('%Y-%m-%d')}**")
+                st.info(f"📅 Calculated EDD: **{edd.isoformat()}**")
                 st.info(f"📊 Gestational Age: **{gestational_week} weeks**")
             else:
                 edd = None
@@ -143,30 +317,33 @@ with tab1:
         with col2:
             st.markdown("**Vitals & Measurements**")
             fundal_height = st.number_input("Fundal Height (cm)", min_value=0.0, max_value=50.0, 
-                                           step=0.5, format="%.1f", value=0.0)
+                                           step=0.5, format="%.1f", key="anc_fundal_height")
             fetal_heart_rate = st.number_input("Fetal Heart Rate (bpm)", min_value=0, max_value=200, 
-                                              value=0)
-            bp_systolic = st.number_input("BP Systolic (mmHg)", min_value=0, max_value=250, value=120)
-            bp_diastolic = st.number_input("BP Diastolic (mmHg)", min_value=0, max_value=150, value=80)
+                                              key="anc_fhr")
+            bp_systolic = st.number_input("BP Systolic (mmHg)", min_value=0, max_value=250, key="anc_bp_sys")
+            bp_diastolic = st.number_input("BP Diastolic (mmHg)", min_value=0, max_value=150, key="anc_bp_dia")
         
         col3, col4 = st.columns(2)
         
         with col3:
             st.markdown("**Laboratory Tests**")
-            urine_albumin = st.selectbox("Urine Albumin", ["", "Nil", "Trace", "+", "++", "+++"])
+            urine_albumin = st.selectbox("Urine Albumin", ["", "Nil", "Trace", "+", "++", "+++"],
+                                         key="anc_urine_albumin")
             hemoglobin = st.number_input("Hemoglobin (g/dL)", min_value=0.0, max_value=20.0, 
-                                        step=0.1, format="%.1f", value=0.0)
+                                        step=0.1, format="%.1f", key="anc_hb")
         
         with col4:
             st.markdown("**Supplements & Immunization**")
-            tt_dose = st.number_input("TT Dose Number", min_value=0, max_value=5, value=0, 
+            tt_dose = st.number_input("TT Dose Number", min_value=0, max_value=5, key="anc_tt_dose",
                                      help="Tetanus Toxoid dose number")
             calcium_iron_status = st.selectbox("Calcium & Iron Supplementation", 
-                                              ["", "Regular", "Irregular", "Not Started"])
+                                              ["", "Regular", "Irregular", "Not Started"],
+                                              key="anc_calcium_iron")
         
         st.markdown("**Danger Signs & Notes**")
         danger_signs = st.text_area("Danger Signs (if any)", 
-                                    placeholder="e.g., Bleeding, severe headache, blurred vision, reduced fetal movements...")
+                                    placeholder="e.g., Bleeding, severe headache, blurred vision, reduced fetal movements...",
+                                    key="anc_danger_signs")
         
         submitted = st.form_submit_button("💾 Save ANC Record", use_container_width=True)
         
@@ -178,9 +355,9 @@ with tab1:
                     'resident_id': selected_mother['unique_id'],
                     'pregnancy_id': pregnancy_id,
                     'visit_type': 'ANC',
-                    'visit_date': visit_date.strftime('%Y-%m-%d'),
-                    'lmp_date': lmp_date.strftime('%Y-%m-%d'),
-                    'edd_date': edd.strftime('%Y-%m-%d') if edd else None,
+                    'visit_date': visit_date.isoformat(),
+                    'lmp_date': lmp_date.isoformat(),
+                    'edd_date': edd.isoformat() if edd else None,
                     'gestational_week': gestational_week,
                     'fundal_height': fundal_height if fundal_height > 0 else None,
                     'fetal_heart_rate': fetal_heart_rate if fetal_heart_rate > 0 else None,
@@ -190,28 +367,26 @@ with tab1:
                     'calcium_iron_status': calcium_iron_status if calcium_iron_status else None,
                     'danger_signs': danger_signs if danger_signs else None,
                     'bp_systolic': bp_systolic if bp_systolic > 0 else None,
+                    'bp_diastolic': bp_diastolic if bp_diastolic > 0 else None,
                     'delivery_outcome': None
                 }
                 
                 if db.add_maternal_health_record(anc_data):
-                    st.success("✅ ANC record saved successfully!")
+                    _clear_maternal_cache()
+                    st.toast("✅ ANC record saved successfully!")
                     
                     # Clear the stored new-pregnancy ID so a fresh one is generated next time
                     _new_preg_key = f"new_preg_id_{selected_mother['unique_id']}"
                     if _new_preg_key in st.session_state:
                         del st.session_state[_new_preg_key]
                     
-                    # Show alerts for high-risk factors
-                    if bp_systolic >= 140 or bp_diastolic >= 90:
-                        st.error("⚠️ ALERT: High Blood Pressure detected! Immediate referral recommended.")
-                    
-                    if hemoglobin > 0 and hemoglobin < 11:
-                        st.error("⚠️ ALERT: Anemia detected! (Hb < 11 g/dL)")
-                    
-                    if danger_signs:
-                        st.error("⚠️ ALERT: Danger signs reported! Immediate attention required.")
-                    
-                    st.rerun()
+                    # Alerts for high-risk factors, shown above the cleared form
+                    vitals = {'bp_systolic': bp_systolic, 'bp_diastolic': bp_diastolic,
+                              'hemoglobin': hemoglobin, 'danger_signs': danger_signs}
+                    st.session_state['_anc_alerts'] = [alert for _, check, alert in ANC_RISK_RULES
+                                                       if check(vitals)]
+                    st.session_state['_anc_saved'] = True
+                    st.rerun(scope="fragment")
                 else:
                     st.error("Failed to save ANC record")
     
@@ -219,27 +394,22 @@ with tab1:
     st.markdown("---")
     st.subheader("ANC Visit History")
     
-    maternal_records = db.get_maternal_health_records(selected_mother['unique_id'])
-    anc_records = [r for r in maternal_records if r.get('visit_type') == 'ANC']
-    
-    if anc_records:
-        import pandas as pd
-        df = pd.DataFrame(anc_records)
-        df = df.sort_values('visit_date', ascending=False)
-        
-        display_cols = ['pregnancy_id', 'visit_date', 'gestational_week', 'bp_systolic', 'hemoglobin', 
-                       'fetal_heart_rate', 'tt_dose', 'danger_signs']
-        display_df = df[display_cols].copy()
-        display_df.columns = ['Pregnancy ID', 'Visit Date', 'Gestational Week', 'BP Systolic', 'Hb (g/dL)', 
-                             'FHR (bpm)', 'TT Dose', 'Danger Signs']
-        
-        st.dataframe(display_df, use_container_width=True, hide_index=True)
+    anc_history = _history_table(selected_mother['unique_id'], 'ANC', ANC_SCHEMA)
+    if anc_history.num_rows:
+        st.dataframe(anc_history, use_container_width=True, hide_index=True,
+                     column_order=list(ANC_COLUMNS), column_config=ANC_COLUMNS)
     else:
         st.info("No ANC records found for this mother.")
 
-with tab2:
+
+@st.fragment
+def _pnc_tab(selected_mother):
+    """Postnatal care visit form and PNC history."""
     st.subheader("Postnatal Care (PNC) Visit")
     
+    _reset_form('_pnc_saved', PNC_FORM_KEYS, PNC_FORM_DEFAULTS)
+    _show_save_alerts('_pnc_alerts')
+    
     with st.form("pnc_form"):
         col1, col2 = st.columns(2)
         
@@ -261,11 +431,11 @@ with tab2:
         with col2:
             st.markdown("**Mother's Vitals**")
             bp_systolic_pnc = st.number_input("BP Systolic (mmHg)", min_value=0, max_value=250, 
-                                             value=120, key="pnc_bp_sys")
+                                             key="pnc_bp_sys")
             bp_diastolic_pnc = st.number_input("BP Diastolic (mmHg)", min_value=0, max_value=150, 
-                                              value=80, key="pnc_bp_dia")
+                                              key="pnc_bp_dia")
             hemoglobin_pnc = st.number_input("Hemoglobin (g/dL)", min_value=0.0, max_value=20.0, 
-                                            step=0.1, format="%.1f", value=0.0, key="pnc_hb")
+                                            step=0.1, format="%.1f", key="pnc_hb")
         
         st.markdown("**Delivery Outcome**")
         delivery_outcome = st.text_area("Delivery Details", 
@@ -285,9 +455,9 @@ with tab2:
             else:
                 pnc_data = {
                     'resident_id': selected_mother['unique_id'],
-                    'pregnancy_id': pregnancy_id_pnc if pregnancy_id_pnc else f"PNC-{uuid.uuid4().hex[:8].upper()}",
+                    'pregnancy_id': pregnancy_id_pnc if pregnancy_id_pnc else f"PNC-{secrets.token_hex(4).upper()}",
                     'visit_type': 'PNC',
-                    'visit_date': visit_date_pnc.strftime('%Y-%m-%d'),
+                    'visit_date': visit_date_pnc.isoformat(),
                     'lmp_date': None,
                     'edd_date': None,
                     'gestational_week': None,
@@ -299,23 +469,21 @@ with tab2:
                     'calcium_iron_status': None,
                     'danger_signs': danger_signs_pnc if danger_signs_pnc else None,
                     'bp_systolic': bp_systolic_pnc if bp_systolic_pnc > 0 else None,
+                    'bp_diastolic': bp_diastolic_pnc if bp_diastolic_pnc > 0 else None,
                     'delivery_outcome': delivery_outcome if delivery_outcome else None
                 }
                 
                 if db.add_maternal_health_record(pnc_data):
-                    st.success("✅ PNC record saved successfully!")
-                    
-                    # Alerts
-                    if bp_systolic_pnc >= 140:
-                        st.error("⚠️ ALERT: High Blood Pressure postpartum!")
-                    
-                    if hemoglobin_pnc > 0 and hemoglobin_pnc < 10:
-                        st.error("⚠️ ALERT: Severe Anemia postpartum! (Hb < 10 g/dL)")
-                    
-                    if danger_signs_pnc:
-                        st.error("⚠️ ALERT: Danger signs reported! Immediate attention required.")
+                    _clear_maternal_cache()
+                    st.toast("✅ PNC record saved successfully!")
                     
-                    st.rerun()
+                    # Alerts, shown above the cleared form
+                    vitals = {'bp_systolic': bp_systolic_pnc, 'bp_diastolic': bp_diastolic_pnc,
+                              'hemoglobin': hemoglobin_pnc, 'danger_signs': danger_signs_pnc}
+                    st.session_state['_pnc_alerts'] = [alert for _, check, alert in PNC_RISK_RULES
+                                                       if check(vitals)]
+                    st.session_state['_pnc_saved'] = True
+                    st.rerun(scope="fragment")
                 else:
                     st.error("Failed to save PNC record")
     
@@ -323,240 +491,130 @@ with tab2:
     st.markdown("---")
     st.subheader("PNC Visit History")
     
-    maternal_records = db.get_maternal_health_records(selected_mother['unique_id'])
-    pnc_records = [r for r in maternal_records if r.get('visit_type') == 'PNC']
-    
-    if pnc_records:
-        import pandas as pd
-        df_pnc = pd.DataFrame(pnc_records)
-        df_pnc = df_pnc.sort_values('visit_date', ascending=False)
-        
-        display_cols = ['visit_date', 'bp_systolic', 'hemoglobin', 'delivery_outcome', 'danger_signs']
-        display_df_pnc = df_pnc[display_cols].copy()
-        display_df_pnc.columns = ['Visit Date', 'BP Systolic', 'Hb (g/dL)', 'Delivery Outcome', 'Danger Signs']
-        
-        st.dataframe(display_df_pnc, use_container_width=True, hide_index=True)
+    pnc_history = _history_table(selected_mother['unique_id'], 'PNC', PNC_SCHEMA)
+    if pnc_history.num_rows:
+        st.dataframe(pnc_history, use_container_width=True, hide_index=True,
+                     column_order=list(PNC_COLUMNS), column_config=PNC_COLUMNS)
     else:
         st.info("No PNC records found for this mother.")
 
-with tab3:
+
+@st.fragment
+def _high_risk_tab():
+    """Dashboard of mothers with high-risk ANC findings."""
     st.subheader("⚠️ High-Risk Mothers Dashboard")
     st.markdown("List of mothers requiring immediate attention based on ANC records")
     
     # Get high-risk mothers
-    high_risk = db.get_high_risk_mothers()
+    high_risk = _load_high_risk()
     
     if not high_risk:
         st.success("✓ No high-risk mothers identified at this time.")
     else:
-        import pandas as pd
-        
-        # Create display dataframe
-        risk_data = []
-        for record in high_risk:
-            risk_factors = []
-            
-            bp_sys = record.get('bp_systolic', 0) or 0
-            hb = record.get('hemoglobin', 100) or 100
-            danger = record.get('danger_signs', '')
-            
-            if bp_sys >= 140:
-                risk_factors.append("High BP")
-            if hb < 11:
-                risk_factors.append("Anemia")
-            if danger:
-                risk_factors.append("Danger Signs")
-            
-            risk_data.append({
-                'Name': record.get('resident_name', 'Unknown'),
-                'ID': record.get('resident_id', ''),
-                'Last Visit': record.get('visit_date', ''),
-                'Gestational Week': record.get('gestational_week', 'N/A'),
-                'BP': f"{bp_sys}/{record.get('bp_diastolic', 0) or 0}" if bp_sys > 0 else 'N/A',
-                'Hb': f"{hb:.1f}" if hb < 100 else 'N/A',
-                'Risk Factors': ', '.join(risk_factors)
-            })
+        # Create display dataframe with column-wise risk checks
+        df_hr = pd.DataFrame(high_risk, columns=_HIGH_RISK_COLUMNS).fillna(HIGH_RISK_DEFAULTS)
+        df_hr = df_hr.astype({'bp_systolic': int, 'bp_diastolic': int, 'hemoglobin': float})
+        risk_mask = sum(check(df_hr).to_numpy().astype(np.uint8) << bit
+                        for bit, (_, check, _) in enumerate(ANC_RISK_RULES))
         
-        df_risk = pd.DataFrame(risk_data)
+        bp_sys, hb = df_hr['bp_systolic'], df_hr['hemoglobin']
+        df_risk = pd.DataFrame({
+            'Name': df_hr['resident_name'],
+            'ID': df_hr['resident_id'],
+            'Last Visit': df_hr['visit_date'],
+            'Gestational Week': df_hr['gestational_week'].astype('Int64').astype(object).fillna('N/A'),
+            'BP': np.where(bp_sys > 0, bp_sys.astype(str) + '/' + df_hr['bp_diastolic'].astype(str), 'N/A'),
+            'Hb': np.where(hb > 0, hb.map('{:.1f}'.format), 'N/A'),
+            'Risk Factors': RISK_LUT[risk_mask],
+        })
         st.dataframe(df_risk, use_container_width=True, hide_index=True)
         
         st.markdown(f"**Total High-Risk Mothers: {len(high_risk)}**")
 
-with tab4:
+
+@st.fragment
+def _mch_tab(selected_mother):
+    """MCH supportive supervision proforma form."""
     st.subheader("MCH Supportive Supervision Proforma")
     st.markdown("Complete the MCH assessment and save it against the mother's record.")
 
     with st.form("mch_proforma_form"):
-        # --- Early Registration ---
-        with st.expander("📋 Early Registration", expanded=True):
-            col1, col2 = st.columns(2)
-            with col1:
-                mcp_card_avail = st.radio("MCP Card Available", ["Yes", "No"], horizontal=True)
-                issued_1st_trimester = st.radio("Issued in 1st Trimester", ["Yes", "No"], horizontal=True)
-                reg_lt12wks = st.radio("Registered <12 Weeks", ["Yes", "No"], horizontal=True)
-            with col2:
-                lmp_mch = st.date_input("LMP Date", value=None, max_value=date.today(), key="mch_lmp")
-                edd_mch = st.date_input("EDD (Expected Delivery Date)", value=None, key="mch_edd")
-                mcts_rch_id = st.text_input("MCTS / RCH ID", placeholder="Enter ID")
-
-        # --- ANC Coverage ---
-        with st.expander("🏥 ANC Coverage"):
-            col1, col2 = st.columns(2)
-            with col1:
-                min4_anc = st.radio("Minimum 4 ANC Visits Completed", ["Yes", "No"], horizontal=True)
-            with col2:
-                weight_gain_recorded = st.radio("Trimester-wise Weight Gain Recorded", ["Yes", "No"],
-                                                horizontal=True)
-
-        # --- IFA & Calcium ---
-        with st.expander("💊 IFA & Calcium"):
-            col1, col2 = st.columns(2)
-            with col1:
-                ifa_start_date = st.date_input("IFA Start Date", value=None, key="ifa_start")
-                ifa_total = st.number_input("Total IFA Tablets (>=180 recommended)",
-                                            min_value=0, max_value=500, value=0)
-                ifa_compliance = st.radio("IFA Compliance", ["Good", "Irregular", "Not taken"],
-                                          horizontal=True)
-            with col2:
-                ifa_side_effects = st.text_input("IFA Side Effects (if any)",
-                                                  placeholder="e.g., Nausea, constipation")
-                calcium_issued = st.radio("Calcium Issued", ["Yes", "No"], horizontal=True)
-
-        # --- Investigations ---
-        with st.expander("🔬 Investigations"):
-            col1, col2 = st.columns(2)
-            with col1:
-                urine_albumin_inv = st.radio("Urine Albumin", ["Done", "Not Done"], horizontal=True)
-                urine_sugar_inv = st.radio("Urine Sugar", ["Done", "Not Done"], horizontal=True)
-                blood_group_inv = st.radio("Blood Group", ["Done", "Not Done"], horizontal=True)
-                hiv_inv = st.radio("HIV Test", ["Done", "Not Done"], horizontal=True)
-                syphilis_inv = st.radio("Syphilis Test", ["Done", "Not Done"], horizontal=True)
-            with col2:
-                usg_inv = st.radio("USG (Ultrasound)", ["Done", "Not Done"], horizontal=True)
-                gdm_inv = st.radio("GDM Screening", ["Done", "Not Done"], horizontal=True)
-                hbsag_inv = st.radio("HBsAg", ["Done", "Not Done"], horizontal=True)
-                tsh_inv = st.radio("TSH", ["Done", "Not Done"], horizontal=True)
-                blood_sugar_inv = st.radio("Blood Sugar", ["Done", "Not Done"], horizontal=True)
-
-        # --- Immunization (TT/Td) ---
-        with st.expander("💉 Immunization (Td)"):
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                td1 = st.radio("Td-1", ["Given", "Not Given"], horizontal=True)
-            with col2:
-                td2 = st.radio("Td-2", ["Given", "Not Given"], horizontal=True)
-            with col3:
-                td_booster = st.radio("Td Booster", ["Given", "Not Given"], horizontal=True)
-
-        # --- Birth Preparedness ---
-        with st.expander("🏠 Birth Preparedness"):
-            col1, col2 = st.columns(2)
-            with col1:
-                birth_place = st.radio("Delivery Place Identified", ["Yes", "No"], horizontal=True)
-                transport_id = st.radio("Transport Identified", ["Yes", "No"], horizontal=True)
-                emergency_contact = st.radio("Emergency Contact Identified", ["Yes", "No"], horizontal=True)
-            with col2:
-                blood_donor = st.radio("Blood Donor Identified", ["Yes", "No"], horizontal=True)
-                danger_signs_gt3 = st.radio("Knows >3 Danger Signs", ["Yes", "No"], horizontal=True)
-
-        # --- Incentives & PNC ---
-        with st.expander("🎁 Incentives & PNC"):
-            col1, col2 = st.columns(2)
-            with col1:
-                pmmvy = st.radio("PMMVY Received", ["Yes", "No"], horizontal=True)
-                jsy = st.radio("JSY Received", ["Yes", "No"], horizontal=True)
-            with col2:
-                pnc_day3 = st.radio("PNC Visit Day 3", ["Done", "Not Done"], horizontal=True)
-                pnc_day7 = st.radio("PNC Visit Day 7", ["Done", "Not Done"], horizontal=True)
-                pnc_day14 = st.radio("PNC Visit Day 14", ["Done", "Not Done"], horizontal=True)
-                pnc_day42 = st.radio("PNC Visit Day 42", ["Done", "Not Done"], horizontal=True)
-                postnatal_ifa = st.radio("Postnatal IFA", ["Given", "Not Given"], horizontal=True)
-                postnatal_calcium = st.radio("Postnatal Calcium", ["Given", "Not Given"], horizontal=True)
-
-        # --- Baby (0-6 months) ---
-        with st.expander("👶 Baby (0-6 Months)"):
-            col1, col2 = st.columns(2)
-            with col1:
-                early_bf_init = st.radio("Early Initiation of Breastfeeding", ["Yes", "No"], horizontal=True)
-                exclusive_bf = st.radio("Exclusive Breastfeeding (6 months)", ["Yes", "No"], horizontal=True)
-            with col2:
-                hbnc_visits = st.radio("HBNC Visits Done", ["Yes", "No"], horizontal=True)
+        answers = {}
+        for i, (section, title, columns) in enumerate(MCH_SPEC):
+            with st.expander(title, expanded=(i == 0)):
+                answers[section] = {}
+                for col, fields in zip(st.columns(len(columns)), columns):
+                    with col:
+                        for field in fields:
+                            answers[section][field[0]] = _mch_field(section, field)
 
         submitted_mch = st.form_submit_button("💾 Save MCH Proforma", use_container_width=True)
 
         if submitted_mch:
             mch_assessment_data = {
-                "early_registration": {
-                    "mcp_card_available": mcp_card_avail,
-                    "issued_1st_trimester": issued_1st_trimester,
-                    "registered_lt12_weeks": reg_lt12wks,
-                    "lmp": lmp_mch.strftime('%Y-%m-%d') if lmp_mch else None,
-                    "edd": edd_mch.strftime('%Y-%m-%d') if edd_mch else None,
-                    "mcts_rch_id": mcts_rch_id if mcts_rch_id else None
-                },
-                "anc_coverage": {
-                    "min_4_visits_completed": min4_anc,
-                    "trimester_weight_gain_recorded": weight_gain_recorded
-                },
-                "ifa_calcium": {
-                    "ifa_start_date": ifa_start_date.strftime('%Y-%m-%d') if ifa_start_date else None,
-                    "ifa_total_tablets": ifa_total,
-                    "ifa_compliance": ifa_compliance,
-                    "ifa_side_effects": ifa_side_effects if ifa_side_effects else None,
-                    "calcium_issued": calcium_issued
-                },
-                "investigations": {
-                    "urine_albumin": urine_albumin_inv,
-                    "urine_sugar": urine_sugar_inv,
-                    "blood_group": blood_group_inv,
-                    "hiv": hiv_inv,
-                    "syphilis": syphilis_inv,
-                    "usg": usg_inv,
-                    "gdm": gdm_inv,
-                    "hbsag": hbsag_inv,
-                    "tsh": tsh_inv,
-                    "blood_sugar": blood_sugar_inv
-                },
-                "immunization_td": {
-                    "td1": td1,
-                    "td2": td2,
-                    "td_booster": td_booster
-                },
-                "birth_preparedness": {
-                    "birth_place_identified": birth_place,
-                    "transport_identified": transport_id,
-                    "emergency_contact": emergency_contact,
-                    "blood_donor_identified": blood_donor,
-                    "knows_gt3_danger_signs": danger_signs_gt3
-                },
-                "incentives_pnc": {
-                    "pmmvy_received": pmmvy,
-                    "jsy_received": jsy,
-                    "pnc_day3": pnc_day3,
-                    "pnc_day7": pnc_day7,
-                    "pnc_day14": pnc_day14,
-                    "pnc_day42": pnc_day42,
-                    "postnatal_ifa": postnatal_ifa,
-                    "postnatal_calcium": postnatal_calcium
-                },
-                "baby_0_6_months": {
-                    "early_bf_initiation": early_bf_init,
-                    "exclusive_breastfeeding": exclusive_bf,
-                    "hbnc_visits_done": hbnc_visits
-                }
+                section: {key: _mch_value(value) for key, value in fields.items()}
+                for section, fields in answers.items()
             }
+            registration = mch_assessment_data["early_registration"]
 
             mch_record = {
                 'resident_id': selected_mother['unique_id'],
                 'visit_type': 'ANC',
-                'visit_date': date.today().strftime('%Y-%m-%d'),
-                'lmp_date': lmp_mch.strftime('%Y-%m-%d') if lmp_mch else None,
-                'edd_date': edd_mch.strftime('%Y-%m-%d') if edd_mch else None,
+                'visit_date': date.today().isoformat(),
+                'lmp_date': registration["lmp"],
+                'edd_date': registration["edd"],
                 'assessment_data': mch_assessment_data
             }
 
             if db.add_maternal_health_record(mch_record):
+                _clear_maternal_cache()
                 st.success("✅ MCH Supportive Supervision Proforma saved successfully!")
             else:
                 st.error("❌ Failed to save MCH proforma. Please try again.")
 
+
+# Mother Selection
+st.subheader("Select Mother")
+
+# Use the new search-to-select widget for mothers
+selected_mother = select_resident_widget(db, key_prefix="maternal_health")
+
+if not selected_mother:
+    st.info("Search for a female resident (age 15-45) to manage maternal health records.")
+    st.stop()
+
+# Validate gender and age
+if selected_mother.get('gender') != 'Female':
+    st.warning(f"⚠️ {selected_mother['name']} is not female. Please select a female resident.")
+    st.stop()
+
+age = selected_mother.get('age')
+if age is not None and (age < 15 or age > 45):
+    st.warning(f"⚠️ {selected_mother['name']} is not in the typical reproductive age range (15-45 years). You can still proceed, but this is outside the normal range.")
+
+
+# Display mother info
+col1, col2, col3 = st.columns(3)
+with col1:
+    st.metric("Name", selected_mother['name'])
+with col2:
+    st.metric("Age", f"{selected_mother.get('age', 'N/A')} years")
+with col3:
+    st.metric("ID", selected_mother['unique_id'])
+
+st.markdown("---")
+
+# Three tabs: ANC, PNC, and High-Risk Dashboard
+tab1, tab2, tab3, tab4 = st.tabs(["🤰 Antenatal Care (ANC)", "👶 Postnatal Care (PNC)", "⚠️ High-Risk Mothers", "📋 MCH Proforma"])
+
+with tab1:
+    _anc_tab(selected_mother)
+
+with tab2:
+    _pnc_tab(selected_mother)
+
+with tab3:
+    _high_risk_tab()
+
+with tab4:
+    _mch_tab(selected_mother)
@@ -72,12 +72,13 @@ def main():
         conn = sqlite3.connect(db_file)
         cursor = conn.cursor()
         
-        # Check tables
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        tables = cursor.fetchall()
+        # Check tables and indexes with a single catalog scan
+        cursor.execute("SELECT type, name FROM sqlite_master WHERE type IN ('table', 'index');")
+        rows = cursor.fetchall()
         
         expected_tables = ['residents', 'visits', 'medical_history']
-        found_tables = [table[0] for table in tables]
+        found_tables = [name for kind, name in rows if kind == 'table']
+        indexes = [name for kind, name in rows if kind == 'index']
         
         print()
         print("Tables created:")
@@ -87,14 +88,10 @@ def main():
             else:
                 print(f"  ✗ {table} (MISSING)")
         
-        # Check indexes
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='index';")
-        indexes = cursor.fetchall()
-        
         print()
         print(f"Indexes created: {len(indexes)}")
         for index in indexes:
-            print(f"  - {index[0]}")
+            print(f"  - {index}")
         
         # Get database size
         db_size = os.path.getsize(db_file)
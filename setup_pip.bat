@@ -9,7 +9,7 @@ echo.
 echo Installing project dependencies...
 echo.
 
-python -m pip install streamlit>=1.31.0
+python -m pip install streamlit>=1.37.0
 python -m pip install streamlit-authenticator>=0.2.3
 python -m pip install pandas>=2.0.0
 python -m pip install plotly>=5.18.0
@@ -13,7 +13,9 @@ from .image_handler import (
     save_uploaded_photo,
     save_multiple_photos,
     photo_exists,
-    get_photo_size_mb
+    batch_photo_exists,
+    get_photo_size_mb,
+    get_photo_info
 )
 from .validators import (
     validate_phone,
@@ -25,10 +27,14 @@ from .validators import (
     validate_height,
     validate_spo2,
     calculate_bmi,
+    calculate_bmi_batch,
     get_bmi_category,
+    get_bmi_category_batch,
+    calculate_edd,
+    calculate_gestational_age,
     validate_required_field
 )
-from .ui_components import select_resident_widget
+from .ui_components import select_resident_widget, clear_resident_search_cache
 
 __all__ = [
     'load_config',
@@ -43,7 +49,9 @@ __all__ = [
     'save_uploaded_photo',
     'save_multiple_photos',
     'photo_exists',
+    'batch_photo_exists',
     'get_photo_size_mb',
+    'get_photo_info',
     'validate_phone',
     'validate_age',
     'validate_blood_pressure',
@@ -53,7 +61,12 @@ __all__ = [
     'validate_height',
     'validate_spo2',
     'calculate_bmi',
+    'calculate_bmi_batch',
     'get_bmi_category',
+    'get_bmi_category_batch',
+    'calculate_edd',
+    'calculate_gestational_age',
     'validate_required_field',
-    'select_resident_widget'
+    'select_resident_widget',
+    'clear_resident_search_cache'
 ]
@@ -4,47 +4,56 @@ Authentication helpers for streamlit-authenticator integration.
 
 import streamlit as st
 import yaml
-from yaml.loader import SafeLoader
+try:
+    # LibYAML-backed parser when PyYAML was built with it
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml.loader import SafeLoader
 import streamlit_authenticator as stauth
 import shutil
 import os
 import copy
 
 
-def load_config(config_path: str = "config.yaml") -> dict:
+def _load_yaml_config(path: str) -> dict:
+    """Load a YAML config file."""
+    with open(path) as file:
+        return yaml.load(file, Loader=SafeLoader)
+
+
+def _convert_secrets_to_dict(obj):
+    """Recursively convert st.secrets objects to regular dicts"""
+    # st.secrets is a special object that needs deep recursive conversion
+    if isinstance(obj, dict):
+        return {k: _convert_secrets_to_dict(v) for k, v in obj.items()}
+    elif hasattr(obj, '__getitem__') and hasattr(obj, 'keys'):
+        # It's dict-like (includes Secrets objects)
+        return {k: _convert_secrets_to_dict(obj[k]) for k in obj.keys()}
+    else:
+        return obj
+
+
+@st.cache_resource(show_spinner=False)
+def _parse_config(config_path: str) -> dict:
     """
-    Load authentication configuration from Streamlit secrets or YAML file.
-    Priority: st.secrets > config.yaml > config.template.yaml
+    Parse the authentication config from Streamlit secrets or a YAML file.
     
-    On Streamlit Cloud, config.yaml won't exist (it's in .gitignore), so this function
-    will load from st.secrets which is where you add credentials in the Streamlit Cloud dashboard.
+    The parsed config is cached once per process and shared by all sessions,
+    so callers must not mutate it (init_authenticator works on a copy).
+    Nothing is drawn here, since cached elements would be replayed on every run.
     
     Args:
-        config_path: Path to config file (used as fallback)
+        config_path: Path to config file (used when secrets have no credentials)
         
     Returns:
         Configuration dictionary
+        
+    Raises:
+        FileNotFoundError: If there are no secrets and config_path is missing
     """
-    # Helper function to load YAML config
-    def _load_yaml_config(path: str) -> dict:
-        with open(path) as file:
-            return yaml.load(file, Loader=SafeLoader)
-    
     # Try to load from Streamlit secrets first (for Cloud deployment)
     try:
         if "credentials" in st.secrets:
-            # st.secrets is a special object that needs deep recursive conversion
-            # We need to convert all nested dicts/objects recursively
-            def _convert_secrets_to_dict(obj):
-                """Recursively convert st.secrets objects to regular dicts"""
-                if isinstance(obj, dict):
-                    return {k: _convert_secrets_to_dict(v) for k, v in obj.items()}
-                elif hasattr(obj, '__getitem__') and hasattr(obj, 'keys'):
-                    # It's dict-like (includes Secrets objects)
-                    return {k: _convert_secrets_to_dict(obj[k]) for k in obj.keys()}
-                else:
-                    return obj
-            
             credentials = _convert_secrets_to_dict(st.secrets["credentials"])
             cookie = _convert_secrets_to_dict(st.secrets.get("cookie", {
                 "name": "cfm_cookie",
@@ -69,8 +78,25 @@ def load_config(config_path: str = "config.yaml") -> dict:
         pass
     
     # Fallback to local config.yaml file
+    return _load_yaml_config(config_path)
+
+
+def load_config(config_path: str = "config.yaml") -> dict:
+    """
+    Load authentication configuration from Streamlit secrets or YAML file.
+    Priority: st.secrets > config.yaml > config.template.yaml
+    
+    On Streamlit Cloud, config.yaml won't exist (it's in .gitignore), so this function
+    will load from st.secrets which is where you add credentials in the Streamlit Cloud dashboard.
+    
+    Args:
+        config_path: Path to config file (used as fallback)
+        
+    Returns:
+        Configuration dictionary (cached and shared; do not mutate)
+    """
     try:
-        return _load_yaml_config(config_path)
+        return _parse_config(config_path)
     except FileNotFoundError:
         # Try to create config.yaml from template
         template_path = "config.template.yaml"
@@ -79,7 +105,7 @@ def load_config(config_path: str = "config.yaml") -> dict:
                 shutil.copy(template_path, config_path)
                 st.success(f"✅ Created '{config_path}' from template.")
                 st.warning("⚠️ Using default configuration. Please review and update credentials for production use.")
-                return _load_yaml_config(config_path)
+                return _parse_config(config_path)
             except Exception as e:
                 st.error(f"Failed to create config file from template: {e}")
                 st.stop()
@@ -101,8 +127,10 @@ def init_authenticator(config: dict):
     Returns:
         Authenticator instance
     """
+    # stauth.Authenticate updates the credentials it is given (login state,
+    # failed attempts), so keep the cached config untouched
     authenticator = stauth.Authenticate(
-        config['credentials'],
+        copy.deepcopy(config['credentials']),
         config['cookie']['name'],
         config['cookie']['key'],
         config['cookie']['expiry_days']
@@ -117,9 +145,6 @@ def check_authentication() -> bool:
     Returns:
         True if authenticated, False otherwise
     """
-    if 'authentication_status' not in st.session_state:
-        return False
-    
     return st.session_state.get('authentication_status', False)
 
 
@@ -130,7 +155,7 @@ def get_current_user() -> str:
     Returns:
         Username or empty string if not logged in
     """
-    if check_authentication():
+    if st.session_state.get('authentication_status'):
         return st.session_state.get('username', '')
     return ''
 
@@ -142,7 +167,7 @@ def get_current_user_name() -> str:
     Returns:
         Full name or empty string if not logged in
     """
-    if check_authentication():
+    if st.session_state.get('authentication_status'):
         return st.session_state.get('name', '')
     return ''
 
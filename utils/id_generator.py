@@ -3,56 +3,56 @@ Unique ID generator for residents.
 Generates IDs in format: VH-YYYY-XXXX (e.g., VH-2026-0001)
 """
 
+import re
+import time
 from datetime import datetime
 from typing import Optional
-from database.db_manager import DatabaseManager
+from database.db_manager import DatabaseManager, get_db_manager
+
+_UID_RE = re.compile(r'^VH-\d{4}-\d{4}$')
+
+# Current year and its "VH-YYYY-" prefix, refreshed at most once a minute
+_YEAR_CACHE = {'year': 0, 'prefix': '', 'expires': 0.0}
+
+
+def _current_year_prefix() -> tuple:
+    """Return (year, "VH-YYYY-" prefix) for the current year."""
+    now = time.monotonic()
+    if now >= _YEAR_CACHE['expires']:
+        year = datetime.now().year
+        _YEAR_CACHE.update(year=year, prefix=f"VH-{year}-", expires=now + 60)
+    return _YEAR_CACHE['year'], _YEAR_CACHE['prefix']
 
 
 def generate_unique_id(db_manager: Optional[DatabaseManager] = None) -> str:
     """
     Generate a unique resident ID in format VH-YYYY-XXXX.
     
+    The sequence is four digits, so at most 9999 IDs can be issued per year.
+    
     Args:
         db_manager: DatabaseManager instance for checking existing IDs
+            (defaults to the shared manager)
         
     Returns:
         Unique ID string
+        
+    Raises:
+        ValueError: If the year's 9999 sequence numbers are used up
     """
     if db_manager is None:
-        db_manager = DatabaseManager()
+        db_manager = get_db_manager()
     
     # Get current year
-    current_year = datetime.now().year
-    
-    # Get all existing IDs for current year
-    all_residents = db_manager.get_all_residents()
+    current_year, prefix = _current_year_prefix()
     
-    # Filter IDs for current year
-    current_year_ids = [
-        r['unique_id'] for r in all_residents 
-        if r['unique_id'].startswith(f"VH-{current_year}-")
-    ]
-    
-    if not current_year_ids:
-        # First ID of the year
-        sequence = 1
-    else:
-        # Extract sequence numbers and find max
-        sequences = []
-        for uid in current_year_ids:
-            try:
-                seq_str = uid.split('-')[-1]
-                sequences.append(int(seq_str))
-            except (ValueError, IndexError):
-                continue
-        
-        if sequences:
-            sequence = max(sequences) + 1
-        else:
-            sequence = 1
+    # Highest sequence already issued this year (0 if none)
+    sequence = db_manager.get_max_resident_sequence(current_year) + 1
+    if sequence > 9999:
+        raise ValueError(f"All resident IDs for {current_year} are in use")
     
     # Format: VH-YYYY-XXXX (4-digit zero-padded sequence)
-    unique_id = f"VH-{current_year}-{sequence:04d}"
+    unique_id = f"{prefix}{sequence:04d}"
     
     return unique_id
 
@@ -67,6 +67,7 @@ def validate_unique_id_format(unique_id: str) -> bool:
     Returns:
         True if valid format, False otherwise
     """
-    import re
-    pattern = r'^VH-\d{4}-\d{4}$'
-    return bool(re.match(pattern, unique_id))
+    # Cheap length/separator checks reject most malformed IDs before the regex
+    if len(unique_id) != 12 or unique_id[:3] != 'VH-' or unique_id[7] != '-':
+        return False
+    return _UID_RE.match(unique_id) is not None
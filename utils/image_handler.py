@@ -3,21 +3,59 @@ Image handler for photo uploads and compression.
 Handles profile photos and visit photos with Supabase Storage.
 """
 
+import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional, List
+from functools import lru_cache
+from typing import Optional, List, Tuple
 from PIL import Image
 import io
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
 from supabase import create_client, Client
 import streamlit as st
 from dotenv import load_dotenv
 
+# Optional: libvips (via pyvips) resizes and encodes faster and with less
+# memory than Pillow; compress_image falls back to Pillow without it
+try:
+    import pyvips
+except ImportError:
+    pyvips = None
+
+# Optional: PyTurboJPEG binds libjpeg-turbo directly for faster JPEG
+# decode/encode when pyvips isn't installed (needs the libturbojpeg library)
+try:
+    from turbojpeg import TurboJPEG, TJPF_RGB, TJSAMP_420
+    _TJ = TurboJPEG()
+except (ImportError, OSError, RuntimeError):
+    _TJ = None
+
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Storage bucket used when callers don't name one
+try:
+    _DEFAULT_BUCKET = st.secrets.get("SUPABASE_BUCKET_NAME", os.getenv("SUPABASE_BUCKET_NAME", "resident-photos"))
+except (AttributeError, KeyError, FileNotFoundError):
+    _DEFAULT_BUCKET = os.getenv("SUPABASE_BUCKET_NAME", "resident-photos")
+# Metadata-free JPEG uploads no wider than max_width and under this size
+# are stored as-is
+_PASSTHROUGH_MAX_BYTES = 500 * 1024
 
+# Shared HTTP session for photo HEAD checks, so repeated checks reuse
+# pooled keep-alive connections instead of opening one per request
+_HTTP = requests.Session()
+_HTTP.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=1))
+
+
+@lru_cache(maxsize=1)
 def get_supabase_client() -> Client:
-    """Get Supabase client for storage operations."""
+    """Get the Supabase client for storage operations (one per process, so its HTTP connections are reused)."""
     try:
         supabase_url = st.secrets.get("SUPABASE_URL", os.getenv("SUPABASE_URL"))
         supabase_key = st.secrets.get("SUPABASE_KEY", os.getenv("SUPABASE_KEY"))
@@ -31,7 +69,8 @@ def get_supabase_client() -> Client:
     return create_client(supabase_url, supabase_key)
 
 
-def compress_image(image_bytes: bytes, max_width: int = 1200, quality: int = 85) -> bytes:
+def compress_image(image_bytes: bytes, max_width: int = 1200, quality: int = 85,
+                   optimize: bool = False) -> bytes:
     """
     Compress an image to reduce file size.
     
@@ -39,33 +78,64 @@ def compress_image(image_bytes: bytes, max_width: int = 1200, quality: int = 85)
         image_bytes: Original image bytes
         max_width: Maximum width in pixels
         quality: JPEG quality (1-100)
+        optimize: Run the extra Huffman-table pass (a few % smaller files,
+            roughly twice the encode time)
         
     Returns:
         Compressed image bytes
     """
-    # Open image from bytes
+    # Open image from bytes (only the header is read at this point)
     img = Image.open(io.BytesIO(image_bytes))
     
-    # Convert RGBA to RGB if necessary
-    if img.mode in ('RGBA', 'LA', 'P'):
-        background = Image.new('RGB', img.size, (255, 255, 255))
-        if img.mode == 'P':
-            img = img.convert('RGBA')
-        background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-        img = background
+    # Already small enough: skip the decode/re-encode and its quality loss.
+    # Photos carrying EXIF/XMP (camera GPS location) are always re-encoded,
+    # which strips the metadata before it reaches the public bucket.
+    if (img.format == 'JPEG' and img.width <= max_width
+            and len(image_bytes) <= _PASSTHROUGH_MAX_BYTES
+            and 'exif' not in img.info and 'xmp' not in img.info):
+        return image_bytes
+    
+    if pyvips is not None:
+        # Shrink-on-load thumbnail bounded by width only, never upscaled
+        vips_img = pyvips.Image.thumbnail_buffer(image_bytes, max_width, height=10_000_000, size='down')
+        if vips_img.hasalpha():
+            vips_img = vips_img.flatten(background=255)
+        return vips_img.jpegsave_buffer(Q=quality, strip=True, optimize_coding=optimize)
+    
+    if _TJ is not None and img.format == 'JPEG' and img.mode in ('RGB', 'L'):
+        # Decode at the smallest libjpeg-turbo scale that keeps max_width
+        scale = min((f for f in _TJ.scaling_factors if img.width * f[0] >= max_width * f[1]),
+                    key=lambda f: f[0] / f[1], default=(1, 1))
+        img = Image.fromarray(_TJ.decode(image_bytes, pixel_format=TJPF_RGB, scaling_factor=scale))
+        if img.width > max_width:
+            img.thumbnail((max_width, img.height), Image.LANCZOS)
+        return _TJ.encode(np.asarray(img), quality=quality, pixel_format=TJPF_RGB,
+                          jpeg_subsample=TJSAMP_420)
     
-    # Resize if too wide
+    # For JPEGs, let the decoder downscale while decoding (never below
+    # max_width) instead of decoding at full size
+    img.draft('RGB', (max_width, max_width))
+    
+    # Palette images can't be resampled with LANCZOS, so expand them first
+    if img.mode == 'P':
+        img = img.convert('RGBA')
+    
+    # Resize (in place) if too wide, before compositing so the alpha
+    # flattening below only touches the downscaled pixels
     if img.width > max_width:
-        ratio = max_width / img.width
-        new_height = int(img.height * ratio)
-        img = img.resize((max_width, new_height), Image.LANCZOS)
+        img.thumbnail((max_width, img.height), Image.LANCZOS)
+    
+    # Flatten transparency onto white
+    if img.mode in ('RGBA', 'LA'):
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1])
+        img = background
     
     # Save to bytes with compression
     output = io.BytesIO()
-    img.save(output, format='JPEG', quality=quality, optimize=True)
-    output.seek(0)
+    img.save(output, format='JPEG', quality=quality, optimize=optimize, progressive=False)
     
-    return output.read()
+    return output.getvalue()
 
 
 def save_uploaded_photo(
@@ -88,16 +158,15 @@ def save_uploaded_photo(
     """
     try:
         if bucket_name is None:
-            try:
-                bucket_name = st.secrets.get("SUPABASE_BUCKET_NAME", os.getenv("SUPABASE_BUCKET_NAME", "resident-photos"))
-            except (AttributeError, KeyError):
-                bucket_name = os.getenv("SUPABASE_BUCKET_NAME", "resident-photos")
+            bucket_name = _DEFAULT_BUCKET
         
         # Read uploaded file
         image_bytes = uploaded_file.read()
         
-        # Compress image
+        # Compress image, then drop the original so only the compressed
+        # copy is held in memory during the upload
         compressed_bytes = compress_image(image_bytes)
+        del image_bytes
         
         # Generate filename
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -115,8 +184,10 @@ def save_uploaded_photo(
         public_url = supabase.storage.from_(bucket_name).get_public_url(filename)
         
         return public_url
-    except Exception as e:
-        print(f"Error saving photo: {e}")
+    except Exception:
+        # Storage/network errors surface as several exception types; any
+        # failure just means this photo is skipped
+        logger.exception("Error saving photo for %s", resident_id)
         return None
 
 
@@ -138,16 +209,73 @@ def save_multiple_photos(
     Returns:
         List of public URLs to saved photos
     """
-    saved_urls = []
+    if not uploaded_files:
+        return []
     
-    for idx, uploaded_file in enumerate(uploaded_files):
+    def _save(idx: int, uploaded_file) -> Optional[str]:
         # Add index to photo type to differentiate multiple photos
-        indexed_type = f"{photo_type}_{idx+1}"
-        url = save_uploaded_photo(uploaded_file, resident_id, indexed_type, bucket_name)
-        if url:
-            saved_urls.append(url)
+        return save_uploaded_photo(uploaded_file, resident_id, f"{photo_type}_{idx+1}", bucket_name)
+    
+    # Compress and upload concurrently (PIL releases the GIL while decoding,
+    # resizing and encoding, and uploads are I/O-bound); map() keeps the
+    # URLs in upload order
+    with ThreadPoolExecutor(max_workers=min(8, len(uploaded_files))) as pool:
+        urls = pool.map(_save, range(len(uploaded_files)), uploaded_files)
+        return [url for url in urls if url]
+
+
+def _head_info(photo_url: str) -> Tuple[bool, float]:
+    """
+    Uncached HEAD request for (accessible, size in MB), safe to run on worker threads.
     
-    return saved_urls
+    Raises:
+        requests.RequestException: On timeouts, connection errors and 5xx
+            responses, which say nothing about whether the photo exists
+    """
+    response = _HTTP.head(photo_url, timeout=5, allow_redirects=False)
+    if response.status_code >= 500:
+        response.raise_for_status()
+    if response.status_code != 200:
+        return False, 0.0
+    try:
+        return True, int(response.headers.get('content-length', 0)) / (1024 * 1024)
+    except ValueError:
+        return False, 0.0
+
+
+class _NotCached(Exception):
+    """Raised by a get_photo_info probe for a URL with no cached result."""
+
+
+# get_photo_info(url, _known=_PROBE) returns a cached result or raises _NotCached
+_PROBE = object()
+
+
+# Uploaded photo URLs are never overwritten, so HEAD results are cached per
+# URL across reruns; the hourly TTL picks up photos deleted from storage.
+# Transient failures raise, and Streamlit never caches a raised exception.
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_photo_info(photo_url: str, _known=None) -> Tuple[bool, float]:
+    """
+    Check a photo URL and get its size with a single HEAD request.
+    
+    Args:
+        photo_url: URL to photo
+        _known: Internal (not part of the cache key): a HEAD result to cache
+            for photo_url instead of requesting it, or _PROBE to look up the
+            cached result without sending a request
+        
+    Returns:
+        Tuple of (is_accessible, size_mb); size is 0.0 if not accessible
+        
+    Raises:
+        requests.RequestException: If the HEAD request failed transiently
+    """
+    if _known is _PROBE:
+        raise _NotCached(photo_url)
+    if _known is not None:
+        return _known
+    return _head_info(photo_url)
 
 
 def photo_exists(photo_url: str) -> bool:
@@ -161,13 +289,48 @@ def photo_exists(photo_url: str) -> bool:
         True if accessible, False otherwise
     """
     try:
-        import requests
-        response = requests.head(photo_url, timeout=5)
-        return response.status_code == 200
-    except (requests.RequestException, Exception):
+        return get_photo_info(photo_url)[0]
+    except requests.RequestException as e:
+        logger.warning("Photo check failed for %s: %s", photo_url, e)
         return False
 
 
+def batch_photo_exists(photo_urls: List[str]) -> List[bool]:
+    """
+    Check several photo URLs, sharing get_photo_info's per-URL cache.
+    
+    Cached URLs are answered directly; the rest are checked concurrently
+    and their results are stored in the cache.
+    
+    Args:
+        photo_urls: URLs to photos
+        
+    Returns:
+        List of accessibility flags, in the same order as photo_urls
+    """
+    unique_urls = list(dict.fromkeys(photo_urls))
+    info = {}
+    for url in unique_urls:
+        try:
+            info[url] = get_photo_info(url, _known=_PROBE)
+        except _NotCached:
+            pass
+    
+    misses = [url for url in unique_urls if url not in info]
+    if misses:
+        with ThreadPoolExecutor(max_workers=min(16, len(misses))) as pool:
+            futures = [pool.submit(_head_info, url) for url in misses]
+        for url, future in zip(misses, futures):
+            try:
+                # Seed the per-URL cache on the script thread
+                info[url] = get_photo_info(url, _known=future.result())
+            except requests.RequestException as e:
+                logger.warning("Photo check failed for %s: %s", url, e)
+                info[url] = (False, 0.0)
+    
+    return [info[url][0] for url in photo_urls]
+
+
 def get_photo_size_mb(photo_url: str) -> float:
     """
     Get photo file size in MB from URL.
@@ -179,9 +342,7 @@ def get_photo_size_mb(photo_url: str) -> float:
         File size in MB
     """
     try:
-        import requests
-        response = requests.head(photo_url, timeout=5)
-        size_bytes = int(response.headers.get('content-length', 0))
-        return size_bytes / (1024 * 1024)
-    except (requests.RequestException, ValueError, Exception):
+        return get_photo_info(photo_url)[1]
+    except requests.RequestException as e:
+        logger.warning("Photo size check failed for %s: %s", photo_url, e)
         return 0.0
@@ -4,7 +4,18 @@ Provides reusable UI components for Streamlit pages.
 """
 
 import streamlit as st
-from typing import Optional, Dict
+from typing import Optional, Dict, List
+
+
+@st.cache_data(ttl=30, max_entries=128, show_spinner=False)
+def _search_residents(_db_manager, search_term: str) -> List[Dict]:
+    """Resident search results, shared across reruns and sessions for 30s."""
+    return _db_manager.search_residents(search_term)
+
+
+def clear_resident_search_cache() -> None:
+    """Drop cached resident search results (call after adding a resident)."""
+    _search_residents.clear()
 
 
 def select_resident_widget(db_manager, key_prefix: str = "") -> Optional[Dict]:
@@ -39,7 +50,7 @@ def select_resident_widget(db_manager, key_prefix: str = "") -> Optional[Dict]:
     
     # Only search if user has typed something
     if search_term and len(search_term) >= 2:
-        residents = db_manager.search_residents(search_term)
+        residents = _search_residents(db_manager, search_term)
         
         if residents:
             st.write(f"Found {len(residents)} resident(s)")
@@ -52,14 +63,19 @@ def select_resident_widget(db_manager, key_prefix: str = "") -> Optional[Dict]:
             
             selected_display = st.selectbox(
                 "Select Resident",
-                list(resident_options.keys()),
+                resident_options,
                 key=f"{key_prefix}_resident_select"
             )
             
             selected_id = resident_options[selected_display]
             
-            # Get and return the full resident object
-            resident = db_manager.get_resident(selected_id)
+            # Get and return the full resident object, re-querying only when
+            # the selection changes
+            resident_key = f"{key_prefix}_selected_resident"
+            resident = st.session_state.get(resident_key)
+            if not resident or resident.get('unique_id') != selected_id:
+                resident = db_manager.get_resident(selected_id)
+                st.session_state[resident_key] = resident
             return resident
         else:
             st.warning("No residents found matching your search.")
@@ -3,8 +3,18 @@ Input validators for form fields.
 Validates phone numbers, age, medical values, etc.
 """
 
-import re
+from bisect import bisect_right
+from datetime import date, timedelta
+from functools import lru_cache
 from typing import Optional, Tuple
+import numpy as np
+
+# Separators stripped from phone numbers before validation
+_PHONE_STRIP = str.maketrans('', '', ' -')
+
+# BMI category cut-offs (lower bound of each category after the first)
+_BMI_CUTOFFS = (18.5, 25.0, 30.0)
+_BMI_LABELS = ("Underweight", "Normal", "Overweight", "Obese")
 
 
 def validate_phone(phone: str) -> Tuple[bool, str]:
@@ -21,10 +31,10 @@ def validate_phone(phone: str) -> Tuple[bool, str]:
         return True, ""  # Phone is optional
     
     # Remove spaces and dashes
-    cleaned = phone.replace(' ', '').replace('-', '')
+    cleaned = phone.translate(_PHONE_STRIP)
     
-    # Check if 10 digits
-    if not re.match(r'^\d{10}$', cleaned):
+    # Check if 10 digits (isdecimal() matches the same characters as \d)
+    if len(cleaned) != 10 or not cleaned.isdecimal():
         return False, "Phone number must be exactly 10 digits"
     
     return True, ""
@@ -207,14 +217,75 @@ def get_bmi_category(bmi: Optional[float]) -> str:
     if bmi is None:
         return "Unknown"
     
-    if bmi < 18.5:
-        return "Underweight"
-    elif bmi < 25.0:
-        return "Normal"
-    elif bmi < 30.0:
-        return "Overweight"
-    else:
-        return "Obese"
+    return _BMI_LABELS[bisect_right(_BMI_CUTOFFS, bmi)]
+
+
+def calculate_bmi_batch(weights, heights) -> np.ndarray:
+    """
+    Calculate BMI for many residents at once (e.g. DataFrame columns).
+    
+    Args:
+        weights: Weights in kg (None/NaN where missing)
+        heights: Heights in cm (None/NaN/0 where missing)
+        
+    Returns:
+        Array of BMI values rounded to 1 decimal, NaN where not calculable
+    """
+    w = np.asarray(weights, dtype=float)
+    h = np.asarray(heights, dtype=float) / 100.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bmi = np.where(h > 0, w / (h * h), np.nan)
+    return np.round(bmi, 1)
+
+
+def get_bmi_category_batch(bmi) -> np.ndarray:
+    """
+    Get BMI categories for an array of BMI values.
+    
+    Args:
+        bmi: BMI values (NaN where unknown)
+        
+    Returns:
+        Array of BMI category strings ("Unknown" for NaN)
+    """
+    bmi = np.asarray(bmi, dtype=float)
+    categories = np.array(_BMI_LABELS)[np.searchsorted(_BMI_CUTOFFS, bmi, side='right')]
+    return np.where(np.isnan(bmi), "Unknown", categories)
+
+
+# Pure date arithmetic on hashable dates; module-level caches persist for the
+# server process (page scripts are re-executed into a fresh module each rerun)
+@lru_cache(maxsize=256)
+def calculate_edd(lmp_date: Optional[date]) -> Optional[date]:
+    """
+    Calculate Expected Date of Delivery using Naegele's rule (LMP + 280 days).
+    
+    Args:
+        lmp_date: Last menstrual period date
+        
+    Returns:
+        Expected delivery date or None if LMP is missing
+    """
+    if lmp_date:
+        return lmp_date + timedelta(days=280)
+    return None
+
+
+@lru_cache(maxsize=256)
+def calculate_gestational_age(lmp_date: Optional[date], visit_date: Optional[date]) -> Optional[int]:
+    """
+    Calculate gestational age in completed weeks.
+    
+    Args:
+        lmp_date: Last menstrual period date
+        visit_date: Date of the visit
+        
+    Returns:
+        Gestational age in weeks or None if either date is missing
+    """
+    if lmp_date and visit_date:
+        return (visit_date - lmp_date).days // 7
+    return None
 
 
 def validate_required_field(value, field_name: str) -> Tuple[bool, str]:
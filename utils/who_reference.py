@@ -0,0 +1,107 @@
+"""
+WHO child growth reference data and LMS z-score calculations.
+Kept outside the page scripts so the tables and fitted LMS parameters are
+built once per process at import instead of on every Streamlit rerun.
+"""
+
+from types import MappingProxyType
+import numpy as np
+
+# WHO Growth Standards Reference Data (simplified), stored column-wise:
+# one array per (gender, metric, percentile), aligned with WHO['ages'] (months).
+# Weight in kg, height/length in cm.
+WHO = MappingProxyType({
+    'ages': np.array([0, 6, 12, 24, 36, 48, 60]),
+    # Boys Weight-for-Age
+    ('Male', 'weight', 'p3'): np.array([2.5, 6.4, 7.7, 9.7, 11.3, 12.7, 14.1]),
+    ('Male', 'weight', 'p50'): np.array([3.3, 7.9, 9.6, 12.2, 14.3, 16.3, 18.3]),
+    ('Male', 'weight', 'p97'): np.array([4.4, 9.8, 12.0, 15.3, 18.3, 21.2, 24.2]),
+    # Girls Weight-for-Age
+    ('Female', 'weight', 'p3'): np.array([2.4, 5.7, 7.0, 9.0, 10.8, 12.3, 13.7]),
+    ('Female', 'weight', 'p50'): np.array([3.2, 7.3, 9.0, 11.5, 13.9, 16.0, 18.2]),
+    ('Female', 'weight', 'p97'): np.array([4.2, 9.3, 11.5, 14.8, 18.1, 21.5, 25.0]),
+    # Boys Height-for-Age
+    ('Male', 'height', 'p3'): np.array([46.1, 63.3, 71.0, 81.7, 88.7, 94.9, 100.7]),
+    ('Male', 'height', 'p50'): np.array([49.9, 67.6, 75.7, 87.1, 96.1, 103.3, 110.0]),
+    ('Male', 'height', 'p97'): np.array([53.7, 72.0, 80.5, 92.9, 103.3, 111.7, 119.2]),
+    # Girls Height-for-Age
+    ('Female', 'height', 'p3'): np.array([45.4, 61.2, 68.9, 80.0, 87.4, 94.1, 99.9]),
+    ('Female', 'height', 'p50'): np.array([49.1, 65.7, 74.0, 86.4, 95.1, 102.7, 109.4]),
+    ('Female', 'height', 'p97'): np.array([52.9, 70.3, 79.2, 92.9, 102.7, 111.3, 118.9]),
+})
+
+_MONTHS = np.arange(WHO['ages'][-1] + 1)
+
+# Standard normal quantile of the 97th percentile
+_Z97 = 1.880794
+
+
+def reference_key(gender, metric):
+    """Normalize gender/metric into the (gender, metric) part of a WHO key."""
+    return ('Male' if gender == 'Male' else 'Female',
+            'weight' if metric == 'weight' else 'height')
+
+
+def _fit_lms(gender, metric):
+    """
+    Derive monthly WHO LMS (Box-Cox power, median, coefficient of variation)
+    parameters from the p3/p50/p97 reference values.
+    
+    Percentiles are linearly interpolated between the WHO anchor ages for
+    every month 0-60. L is chosen so that p3 and p97 sit symmetrically at
+    -/+1.88 SD on the Box-Cox scale, then S follows from the p97 distance.
+    """
+    p3, m, p97 = (np.interp(_MONTHS, WHO['ages'], WHO[(gender, metric, p)])
+                  for p in ('p3', 'p50', 'p97'))
+    hi, lo = np.log(p97 / m), np.log(p3 / m)
+    
+    def box_cox_sum(l):
+        return np.where(l == 0, hi + lo, np.expm1(l * hi) / np.where(l == 0, 1, l)
+                        + np.expm1(l * lo) / np.where(l == 0, 1, l))
+    
+    # Bisection: the Box-Cox transform is increasing in L
+    l_min, l_max = np.full_like(m, -5.0), np.full_like(m, 5.0)
+    for _ in range(50):
+        l_mid = (l_min + l_max) / 2
+        below = box_cox_sum(l_mid) < 0
+        l_min = np.where(below, l_mid, l_min)
+        l_max = np.where(below, l_max, l_mid)
+    l = np.round((l_min + l_max) / 2, 6)
+    
+    s = np.where(l == 0, hi, np.expm1(l * hi) / np.where(l == 0, 1, l)) / _Z97
+    return l, m, s
+
+
+# Monthly (L, M, S) arrays indexed by age in months, built once at import
+_LMS = MappingProxyType({
+    key: _fit_lms(*key)
+    for key in (('Male', 'weight'), ('Female', 'weight'), ('Male', 'height'), ('Female', 'height'))
+})
+
+# The tables are shared by every session, so make the arrays read-only too
+for _arrays in (WHO.values(), *_LMS.values()):
+    for _arr in _arrays:
+        _arr.setflags(write=False)
+
+
+def calculate_z_scores_vec(values, ages, gender, metric='weight'):
+    """Vectorized WHO LMS z-scores for arrays of measurements and ages (months)."""
+    l, m, s = _LMS[reference_key(gender, metric)]
+    values = np.asarray(values, dtype=float)
+    idx = np.clip(np.nan_to_num(np.asarray(ages, dtype=float)), 0, _MONTHS[-1]).astype(int)
+    l, m, s = l[idx], m[idx], s[idx]
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = values / m
+        return np.where(l != 0,
+                        ((ratio ** l) - 1) / np.where(l != 0, l * s, 1),
+                        np.log(ratio) / s)
+
+
+def calculate_z_score_simple(value, age_months, gender, metric='weight'):
+    """Z-score based on WHO standards using the LMS method."""
+    z_score = calculate_z_scores_vec([value], [age_months], gender, metric)[0]
+    
+    if np.isfinite(z_score):
+        return round(float(z_score), 2)
+    return 0
@@ -2,7 +2,11 @@
 Script to verify config structure and help with Streamlit Secrets format.
 """
 import yaml
-from yaml.loader import SafeLoader
+try:
+    # LibYAML-backed parser when PyYAML was built with it
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml.loader import SafeLoader
 
 # Load the local config.yaml to see exact structure
 with open("config.yaml") as f: